@@ -0,0 +1,220 @@
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+# The two terminal nodes
+FALSE = 0
+TRUE = 1
+
+
+class BDD():
+    """
+    Reduced ordered binary decision diagrams, sharing one table of nodes.
+
+    A node is an int indexing the `levels`, `lows` and `highs` lists: it
+    tests the symbol at its level, and goes to its low child if that
+    symbol is false and its high child if true. The unique table returns
+    the existing node for any (level, low, high) already built, and no
+    node has equal children, so equal functions are the same int and
+    checking a formula is valid or unsatisfiable is comparing it with
+    TRUE or FALSE. Results of combining nodes are kept in an operation
+    cache, so each pair of nodes is combined once.
+
+    Symbols get levels in the order they are first compiled, nearer the
+    root first.
+    """
+
+    def __init__(self):
+        self.symbols = []
+        self.index = {}
+        self.levels = [None, None]
+        self.lows = [None, None]
+        self.highs = [None, None]
+        self.unique = {}
+        self.cache = {}
+        self.compiled = {}
+
+    def __len__(self):
+        return len(self.levels)
+
+    def level(self, u):
+        """Returns the level of a node, below every symbol for terminals."""
+        return len(self.symbols) if u <= TRUE else self.levels[u]
+
+    def node(self, level, low, high):
+        """Returns the node for (level, low, high), building it if new."""
+        if low == high:
+            return low
+        key = (level, low, high)
+        u = self.unique.get(key)
+        if u is None:
+            u = len(self.levels)
+            self.levels.append(level)
+            self.lows.append(low)
+            self.highs.append(high)
+            self.unique[key] = u
+        return u
+
+    def variable(self, name):
+        """Returns the node true exactly when symbol `name` is."""
+        if name not in self.index:
+            self.index[name] = len(self.symbols)
+            self.symbols.append(name)
+        return self.node(self.index[name], FALSE, TRUE)
+
+    def negate(self, u):
+        """Returns the node for the negation of u."""
+        if u <= TRUE:
+            return TRUE - u
+        key = ("not", u)
+        result = self.cache.get(key)
+        if result is None:
+            result = self.node(self.levels[u], self.negate(self.lows[u]),
+                               self.negate(self.highs[u]))
+            self.cache[key] = result
+        return result
+
+    def conjoin(self, u, v):
+        """Returns the node for u and v."""
+        if u == FALSE or v == FALSE:
+            return FALSE
+        if u == TRUE or u == v:
+            return v
+        if v == TRUE:
+            return u
+        if u > v:
+            u, v = v, u
+        key = ("and", u, v)
+        result = self.cache.get(key)
+        if result is None:
+            level = min(self.levels[u], self.levels[v])
+            u_low, u_high = self.branches(u, level)
+            v_low, v_high = self.branches(v, level)
+            result = self.node(level, self.conjoin(u_low, v_low),
+                               self.conjoin(u_high, v_high))
+            self.cache[key] = result
+        return result
+
+    def disjoin(self, u, v):
+        """Returns the node for u or v."""
+        return self.negate(self.conjoin(self.negate(u), self.negate(v)))
+
+    def equal(self, u, v):
+        """Returns the node for u <=> v."""
+        return self.disjoin(self.conjoin(u, v),
+                            self.conjoin(self.negate(u), self.negate(v)))
+
+    def branches(self, u, level):
+        """Returns u's children if it tests `level`, else u twice."""
+        if u > TRUE and self.levels[u] == level:
+            return self.lows[u], self.highs[u]
+        return u, u
+
+    def compile(self, sentence):
+        """Returns the node for a sentence."""
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, And):
+            # And is mutable, so it is compiled again each time
+            u = TRUE
+            for conjunct in sentence.conjuncts:
+                u = self.conjoin(u, self.compile(conjunct))
+            return u
+        if sentence.frozen and sentence in self.compiled:
+            return self.compiled[sentence]
+
+        if isinstance(sentence, Not):
+            u = self.negate(self.compile(sentence.operand))
+        elif isinstance(sentence, Or):
+            u = FALSE
+            for disjunct in sentence.disjuncts:
+                u = self.disjoin(u, self.compile(disjunct))
+        elif isinstance(sentence, Implication):
+            u = self.disjoin(self.negate(self.compile(sentence.antecedent)),
+                             self.compile(sentence.consequent))
+        elif isinstance(sentence, Biconditional):
+            u = self.equal(self.compile(sentence.left),
+                           self.compile(sentence.right))
+        else:
+            raise Exception("nothing to compile")
+
+        # A sentence with an And inside can change, so is compiled again
+        if sentence.frozen:
+            self.compiled[sentence] = u
+        return u
+
+    def entails(self, u, v):
+        """
+        Checks if every model of u is a model of v. This is u and not v
+        being FALSE, but answered without building any nodes, and
+        stopping at the first model of u that is not one of v.
+        """
+        if u == FALSE or v == TRUE or u == v:
+            return True
+        if u == TRUE or v == FALSE:
+            return False
+        key = ("entails", u, v)
+        result = self.cache.get(key)
+        if result is None:
+            level = min(self.level(u), self.level(v))
+            u_low, u_high = self.branches(u, level)
+            v_low, v_high = self.branches(v, level)
+            result = (self.entails(u_low, v_low)
+                      and self.entails(u_high, v_high))
+            self.cache[key] = result
+        return result
+
+    def count(self, u):
+        """Returns the number of models of u over every symbol compiled."""
+        counts = {FALSE: 0, TRUE: 1}
+
+        def below(u):
+            """Counts models of u over the symbols from its level down."""
+            if u not in counts:
+                level = self.levels[u]
+                counts[u] = sum(
+                    below(child) << (self.level(child) - level - 1)
+                    for child in (self.lows[u], self.highs[u])
+                )
+            return counts[u]
+
+        return below(u) << self.level(u)
+
+    def forced(self, u):
+        """
+        Returns {symbol: value} for every symbol with the same value in
+        all models of u, or None if u has no models.
+
+        Every node but FALSE has a model below it, so a symbol can be
+        false if some reachable node tests it and has a low child other
+        than FALSE, or if some edge skips over its level, and likewise
+        for true.
+        """
+        if u == FALSE:
+            return None
+        possible = [set() for _ in self.symbols]
+
+        def skip(top, bottom):
+            for level in range(top, bottom):
+                possible[level].update((False, True))
+
+        skip(0, self.level(u))
+        seen = set()
+        stack = [u]
+        while stack:
+            u = stack.pop()
+            if u <= TRUE or u in seen:
+                continue
+            seen.add(u)
+            level = self.levels[u]
+            for value, child in ((False, self.lows[u]), (True, self.highs[u])):
+                if child != FALSE:
+                    possible[level].add(value)
+                    skip(level + 1, self.level(child))
+                    stack.append(child)
+        return {self.symbols[level]: values.pop()
+                for level, values in enumerate(possible) if len(values) == 1}
+
+
+def entails(knowledge, query):
+    """Checks if knowledge base entails query by compiling both to BDDs."""
+    bdd = BDD()
+    return bdd.entails(bdd.compile(knowledge), bdd.compile(query))
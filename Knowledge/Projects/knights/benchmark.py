@@ -0,0 +1,248 @@
+import argparse
+import time
+
+import puzzle
+from logic import *
+from session import SESSIONS
+
+
+def clue():
+    """Returns the Clue knowledge base from the lecture, and its symbols."""
+    characters = [Symbol(name) for name in ("ColMustard", "ProfPlum",
+                                            "MsScarlet")]
+    rooms = [Symbol(name) for name in ("ballroom", "kitchen", "library")]
+    weapons = [Symbol(name) for name in ("knife", "revolver", "wrench")]
+    mustard, plum, scarlet = characters
+    ballroom, kitchen, library = rooms
+    knife, revolver, wrench = weapons
+
+    knowledge = And(
+        Or(mustard, plum, scarlet),
+        Or(ballroom, kitchen, library),
+        Or(knife, revolver, wrench)
+    )
+    knowledge.add(Not(mustard))
+    knowledge.add(Not(revolver))
+    knowledge.add(Not(kitchen))
+    knowledge.add(Or(Not(scarlet), Not(library), Not(wrench)))
+    knowledge.add(Not(plum))
+    knowledge.add(Not(ballroom))
+    return knowledge, characters + rooms + weapons
+
+
+def mastermind():
+    """
+    Returns the Mastermind knowledge base from the lecture, and its
+    symbols.
+    """
+    colors = ["red", "blue", "green", "yellow"]
+    symbols = [Symbol(f"{color}{i}") for i in range(4) for color in colors]
+    knowledge = And()
+    for color in colors:
+        knowledge.add(Or(*[Symbol(f"{color}{i}") for i in range(4)]))
+    for color in colors:
+        for i in range(4):
+            for j in range(4):
+                if i != j:
+                    knowledge.add(Implication(
+                        Symbol(f"{color}{i}"), Not(Symbol(f"{color}{j}"))
+                    ))
+    for i in range(4):
+        for c1 in colors:
+            for c2 in colors:
+                if c1 != c2:
+                    knowledge.add(Implication(
+                        Symbol(f"{c1}{i}"), Not(Symbol(f"{c2}{i}"))
+                    ))
+    red0, blue1 = Symbol("red0"), Symbol("blue1")
+    green2, yellow3 = Symbol("green2"), Symbol("yellow3")
+    knowledge.add(Or(
+        And(red0, blue1, Not(green2), Not(yellow3)),
+        And(red0, green2, Not(blue1), Not(yellow3)),
+        And(red0, yellow3, Not(blue1), Not(green2)),
+        And(blue1, green2, Not(red0), Not(yellow3)),
+        And(blue1, yellow3, Not(red0), Not(green2)),
+        And(green2, yellow3, Not(red0), Not(blue1))
+    ))
+    knowledge.add(And(
+        Not(Symbol("blue0")),
+        Not(Symbol("red1")),
+        Not(Symbol("green2")),
+        Not(Symbol("yellow3"))
+    ))
+    return knowledge, symbols
+
+
+def houses(n=4):
+    """
+    Returns the lecture's houses puzzle for n people and n houses, and its
+    symbols. With n = 4 it is the lecture's puzzle, with the names
+    numbered.
+    """
+    symbols = [Symbol(f"P{p}H{h}") for p in range(n) for h in range(n)]
+    knowledge = And()
+    for p in range(n):
+        knowledge.add(Or(*[Symbol(f"P{p}H{h}") for h in range(n)]))
+    for p in range(n):
+        for h1 in range(n):
+            for h2 in range(n):
+                if h1 != h2:
+                    knowledge.add(Implication(
+                        Symbol(f"P{p}H{h1}"), Not(Symbol(f"P{p}H{h2}"))
+                    ))
+    for h in range(n):
+        for p1 in range(n):
+            for p2 in range(n):
+                if p1 != p2:
+                    knowledge.add(Implication(
+                        Symbol(f"P{p1}H{h}"), Not(Symbol(f"P{p2}H{h}"))
+                    ))
+    knowledge.add(Or(Symbol("P0H0"), Symbol("P0H2")))
+    knowledge.add(Not(Symbol(f"P1H{n - 1}")))
+    knowledge.add(Symbol("P2H0"))
+    return knowledge, symbols
+
+
+def knights():
+    """Returns the hardest knights puzzle, and its symbols."""
+    return puzzle.knowledge3, [
+        puzzle.AKnight, puzzle.AKnave, puzzle.BKnight, puzzle.BKnave,
+        puzzle.CKnight, puzzle.CKnave
+    ]
+
+
+# Knowledge bases benchmarked, as functions returning (knowledge, symbols)
+PROBLEMS = {
+    "knights": knights,
+    "clue": clue,
+    "mastermind": mastermind,
+    "houses": houses,
+    "houses5": lambda: houses(5),
+}
+
+
+# Backends that evaluate one model at a time, too slow for many symbols
+ONE_AT_A_TIME = {"compiled"}
+
+
+def answers(knowledge, symbols, backend):
+    """
+    Asks whether the knowledge base entails each symbol and its negation,
+    as clue.py does, returning the list of answers.
+    """
+    return [(model_check(knowledge, symbol, backend),
+             model_check(knowledge, Not(symbol), backend))
+            for symbol in symbols]
+
+
+def session_answers(knowledge, symbols, session_class):
+    """
+    Answers the same queries as answers from one session, returning the
+    same list.
+    """
+    session = session_class(knowledge)
+    return [(session.entails(symbol), session.entails(Not(symbol)))
+            for symbol in symbols]
+
+
+def count_nodes(knowledge, symbols, prune):
+    """
+    Returns the totals of enumerate_models' stats over the queries of
+    answers, with the seconds taken.
+    """
+    total = {"nodes": 0, "forced": 0, "pruned": 0}
+    start = time.perf_counter()
+    for symbol in symbols:
+        for query in (symbol, Not(symbol)):
+            stats = {}
+            enumerate_models(knowledge, query, stats, prune)
+            for counter in total:
+                total[counter] += stats[counter]
+    total["seconds"] = time.perf_counter() - start
+    return total
+
+
+def time_session(knowledge, symbols, session_class):
+    """
+    Returns the seconds taken to compile a session of the knowledge base,
+    and then to answer the queries of answers from it.
+    """
+    start = time.perf_counter()
+    session = session_class(knowledge)
+    compiled = time.perf_counter()
+    for symbol in symbols:
+        session.entails(symbol)
+        session.entails(Not(symbol))
+    return compiled - start, time.perf_counter() - compiled
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time the model_check backends on the lecture puzzles."
+    )
+    parser.add_argument("--problems", nargs="+", choices=list(PROBLEMS),
+                        default=list(PROBLEMS))
+    parser.add_argument("--backends", nargs="+", choices=list(BACKENDS),
+                        default=list(BACKENDS))
+    parser.add_argument("--sessions", nargs="*", choices=list(SESSIONS),
+                        default=list(SESSIONS),
+                        help="also time answering every query from one "
+                             "session of each kind")
+    parser.add_argument("--max-enumerate", type=int, default=16,
+                        help="most symbols to run the one model at a time "
+                             "backends, and enumeration of every model, on")
+    args = parser.parse_args()
+
+    print(f"{'problem':<12}{'backend':<16}{'queries':>8}{'seconds':>10}"
+          f"{'speedup':>9}")
+    for name in args.problems:
+        knowledge, symbols = PROBLEMS[name]()
+        expected = None
+        baseline = None
+        runs = [(backend, answers, backend) for backend in args.backends]
+        runs += [(f"{kind} session", session_answers, SESSIONS[kind])
+                 for kind in args.sessions]
+        for backend, run, option in runs:
+            if (backend in ONE_AT_A_TIME
+                    and len(symbols) > args.max_enumerate):
+                print(f"{name:<12}{backend:<16}{'skipped':>8}")
+                continue
+            start = time.perf_counter()
+            result = run(knowledge, symbols, option)
+            seconds = time.perf_counter() - start
+            if expected is None:
+                expected, baseline = result, seconds
+            elif result != expected:
+                raise Exception(f"{backend} disagrees on {name}")
+            print(f"{name:<12}{backend:<16}{2 * len(symbols):>8}"
+                  f"{seconds:>10.3f}{baseline / seconds:>8.1f}x")
+
+    print()
+    print(f"{'problem':<12}{'enumerate':<16}{'nodes':>10}{'forced':>8}"
+          f"{'pruned':>8}{'seconds':>10}")
+    for name in args.problems:
+        knowledge, symbols = PROBLEMS[name]()
+        for prune, label in ((False, "every model"), (True, "pruned")):
+            if not prune and len(symbols) > args.max_enumerate:
+                print(f"{name:<12}{label:<16}{'skipped':>10}")
+                continue
+            total = count_nodes(knowledge, symbols, prune)
+            print(f"{name:<12}{label:<16}{total['nodes']:>10}"
+                  f"{total['forced']:>8}{total['pruned']:>8}"
+                  f"{total['seconds']:>10.3f}")
+
+    if not args.sessions:
+        return
+    print()
+    print(f"{'problem':<12}{'session':<16}{'compile s':>10}{'us/query':>10}")
+    for name in args.problems:
+        knowledge, symbols = PROBLEMS[name]()
+        for kind in args.sessions:
+            compiling, querying = time_session(knowledge, symbols,
+                                               SESSIONS[kind])
+            print(f"{name:<12}{kind:<16}{compiling:>10.4f}"
+                  f"{querying / (2 * len(symbols)) * 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import numpy as np
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+# All 64 models of a word set, and none
+ALL = np.uint64(2 ** 64 - 1)
+NONE = np.uint64(0)
+
+# Models per machine word, as a power of two
+WORD_BITS = 6
+
+
+def vector_expression(sentence, index):
+    """
+    Returns Python source for the sentence's truth value in a block of
+    packed models, as bitwise operations on the symbol columns `c`.
+    """
+    if isinstance(sentence, Symbol):
+        try:
+            return f"c[{index[sentence.name]}]"
+        except KeyError:
+            raise Exception(f"variable {sentence.name} not in model")
+    if isinstance(sentence, Not):
+        return f"(~{vector_expression(sentence.operand, index)})"
+    if isinstance(sentence, And):
+        if not sentence.conjuncts:
+            return "ALL"
+        return "(" + " & ".join(vector_expression(conjunct, index)
+                                for conjunct in sentence.conjuncts) + ")"
+    if isinstance(sentence, Or):
+        if not sentence.disjuncts:
+            return "NONE"
+        return "(" + " | ".join(vector_expression(disjunct, index)
+                                for disjunct in sentence.disjuncts) + ")"
+    if isinstance(sentence, Implication):
+        antecedent = vector_expression(sentence.antecedent, index)
+        consequent = vector_expression(sentence.consequent, index)
+        return f"(~{antecedent} | {consequent})"
+    if isinstance(sentence, Biconditional):
+        left = vector_expression(sentence.left, index)
+        right = vector_expression(sentence.right, index)
+        return f"(~({left} ^ {right}))"
+    raise Exception("nothing to compile")
+
+
+def compile_vector(sentence, symbols):
+    """
+    Compiles a sentence into a function of a list of symbol columns, each
+    an array of packed models, returning the packed truth values.
+    """
+    index = {symbol: i for i, symbol in enumerate(symbols)}
+    source = vector_expression(sentence, index)
+    return eval(f"lambda c: {source}", {"ALL": ALL, "NONE": NONE})
+
+
+def word_pattern(i):
+    """
+    Returns the word whose bit j is bit i of j, the value of symbol i in
+    the j-th model of a word, for i below WORD_BITS.
+    """
+    pattern = 0
+    for j in range(2 ** WORD_BITS):
+        if j >> i & 1:
+            pattern |= 1 << j
+    return np.uint64(pattern)
+
+
+def entails(knowledge, query, block_bits=20):
+    """
+    Checks if knowledge base entails query by evaluating both on every
+    model, 64 models to a machine word.
+
+    Models are numbered as for the compiled backend, bit i of the model
+    number being the value of symbol i, and checked in blocks of up to
+    2 ** block_bits models at a time, so memory does not grow with the
+    number of symbols. Within a block the low symbols vary, each with a
+    fixed column of words. The high symbols are constant over the block,
+    and are passed as single words that broadcast.
+    """
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    knowledge = compile_vector(knowledge, symbols)
+    query = compile_vector(query, symbols)
+
+    n = len(symbols)
+    low = min(n, max(block_bits, WORD_BITS))
+    words = 2 ** max(low - WORD_BITS, 0)
+    word_numbers = np.arange(words, dtype=np.uint64)
+    columns = []
+    for i in range(low):
+        if i < WORD_BITS:
+            columns.append(np.full(words, word_pattern(i), dtype=np.uint64))
+        else:
+            bit = (word_numbers >> np.uint64(i - WORD_BITS)) & np.uint64(1)
+            columns.append(bit * ALL)
+
+    # With fewer symbols than bits in a word, only the first 2 ** n models
+    # of the word exist
+    valid = ALL if n >= WORD_BITS else np.uint64(2 ** 2 ** n - 1)
+
+    for block in range(2 ** (n - low)):
+        high = [ALL if block >> (i - low) & 1 else NONE
+                for i in range(low, n)]
+        c = columns + high
+        counterexamples = knowledge(c) & ~query(c) & valid
+        if np.any(counterexamples):
+            return False
+    return True
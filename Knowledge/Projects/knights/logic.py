@@ -1,20 +1,137 @@
+import copy
 import itertools
+import weakref
 
 
 class Sentence():
+    """
+    A logical sentence.
+
+    Every sentence but And is immutable. A sentence with no And inside it
+    is frozen: it is interned, so building a sentence equal to one that
+    already exists returns that one and equal subformulas are a single
+    shared node, and it computes its hash and symbol set once when built
+    and its formula the first time it is asked for. And stays mutable for
+    knowledge.add, so a sentence containing one can change after it is
+    built, and is neither interned nor cached.
+    """
+
+    # Interned frozen sentences, by their class and operands
+    interned = weakref.WeakValueDictionary()
+
+    # Whether the sentence has no And inside it, so can never change
+    frozen = True
+
+    def __setattr__(self, name, value):
+        raise AttributeError("sentences are immutable")
+
+    @classmethod
+    def make(cls, *operands):
+        """
+        Returns the sentence of this class with these operands, building
+        it only the first time if it is frozen.
+        """
+        frozen = all(operand.frozen for operand in operands
+                     if isinstance(operand, Sentence))
+        key = (cls,) + operands
+        if frozen:
+            sentence = Sentence.interned.get(key)
+            if sentence is not None:
+                return sentence
+        sentence = object.__new__(cls)
+        sentence.build(*operands)
+        sentence.set(frozen=frozen, cached_formula=None)
+        if frozen:
+            sentence.set(cached_hash=sentence.hash_operands(),
+                         symbol_set=frozenset(sentence.collect_symbols()))
+            Sentence.interned[key] = sentence
+        return sentence
+
+    def build(self, *operands):
+        """Sets the attributes of a new sentence."""
+        raise Exception("nothing to build")
+
+    def set(self, **attributes):
+        """Sets attributes while a sentence is being built."""
+        for name, value in attributes.items():
+            object.__setattr__(self, name, value)
+
+    def __hash__(self):
+        if self.frozen:
+            return self.cached_hash
+        return self.hash_operands()
+
+    def hash_operands(self):
+        """Returns the hash of the sentence, for __hash__ to cache."""
+        raise Exception("nothing to hash")
+
+    def operands(self):
+        """Returns the arguments the sentence was built from."""
+        raise Exception("nothing to rebuild")
+
+    def __reduce__(self):
+        # Rebuild through the constructor, so unpickling interns again
+        return (type(self), self.operands())
+
+    def __copy__(self):
+        # A frozen sentence is shared, so a copy of it is itself
+        if self.frozen:
+            return self
+        return type(self)(*self.operands())
+
+    def __deepcopy__(self, memo):
+        if self.frozen:
+            return self
+        return type(self)(*copy.deepcopy(self.operands(), memo))
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
 
+    def evaluate_partial(self, model):
+        """
+        Evaluates the logical sentence in a model that may leave symbols
+        out, returning None if its value depends on them.
+        """
+        raise Exception("nothing to evaluate")
+
     def formula(self):
         """Returns string formula representing logical sentence."""
+        if not self.frozen:
+            return self.write_formula()
+        if self.cached_formula is None:
+            self.set(cached_formula=self.write_formula())
+        return self.cached_formula
+
+    def write_formula(self):
+        """Returns the formula, for formula to cache."""
         return ""
 
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
+        if self.frozen:
+            return set(self.symbol_set)
+        return self.collect_symbols()
+
+    def collect_symbols(self):
+        """Returns the set of symbols, for symbols to cache."""
         return set()
 
+    def expression(self, index):
+        """
+        Returns Python source for the sentence's truth value in the
+        bit-vector model `m`, where index maps each symbol to its bit.
+        """
+        raise Exception("nothing to compile")
+
+    def compile(self, symbols):
+        """
+        Compiles the sentence into a function of an int model, in which
+        bit i is the truth value of symbols[i].
+        """
+        index = {symbol: i for i, symbol in enumerate(symbols)}
+        return eval(f"lambda m: {self.expression(index)}")
+
     @classmethod
     def validate(cls, sentence):
         if not isinstance(sentence, Sentence):
@@ -44,15 +161,26 @@ class Sentence():
 
 class Symbol(Sentence):
 
-    def __init__(self, name):
-        self.name = name
+    def __new__(cls, name):
+        return cls.make(name)
+
+    def build(self, name):
+        self.set(name=name)
 
     def __eq__(self, other):
         return isinstance(other, Symbol) and self.name == other.name
 
-    def __hash__(self):
+    __hash__ = Sentence.__hash__
+
+    def hash_operands(self):
         return hash(("symbol", self.name))
 
+    def operands(self):
+        return (self.name,)
+
+    def collect_symbols(self):
+        return {self.name}
+
     def __repr__(self):
         return self.name
 
@@ -62,35 +190,57 @@ class Symbol(Sentence):
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
 
-    def formula(self):
+    def evaluate_partial(self, model):
+        value = model.get(self.name)
+        return None if value is None else bool(value)
+
+    def write_formula(self):
         return self.name
 
-    def symbols(self):
-        return {self.name}
+    def expression(self, index):
+        try:
+            return f"(m >> {index[self.name]} & 1)"
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
 
 
 class Not(Sentence):
-    def __init__(self, operand):
+    def __new__(cls, operand):
         Sentence.validate(operand)
-        self.operand = operand
+        return cls.make(operand)
+
+    def build(self, operand):
+        self.set(operand=operand)
 
     def __eq__(self, other):
         return isinstance(other, Not) and self.operand == other.operand
 
-    def __hash__(self):
+    __hash__ = Sentence.__hash__
+
+    def hash_operands(self):
         return hash(("not", hash(self.operand)))
 
+    def operands(self):
+        return (self.operand,)
+
+    def collect_symbols(self):
+        return self.operand.symbols()
+
     def __repr__(self):
         return f"Not({self.operand})"
 
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
-    def formula(self):
+    def evaluate_partial(self, model):
+        value = self.operand.evaluate_partial(model)
+        return None if value is None else not value
+
+    def write_formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
+    def expression(self, index):
+        return f"(not {self.operand.expression(index)})"
 
 
 class And(Sentence):
@@ -99,14 +249,24 @@ class And(Sentence):
             Sentence.validate(conjunct)
         self.conjuncts = list(conjuncts)
 
+    # And is the one mutable sentence, so it is never frozen, nor
+    # protected from changes
+    frozen = False
+    __setattr__ = object.__setattr__
+
     def __eq__(self, other):
         return isinstance(other, And) and self.conjuncts == other.conjuncts
 
-    def __hash__(self):
+    __hash__ = Sentence.__hash__
+
+    def hash_operands(self):
         return hash(
             ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
         )
 
+    def operands(self):
+        return tuple(self.conjuncts)
+
     def __repr__(self):
         conjunctions = ", ".join(
             [str(conjunct) for conjunct in self.conjuncts]
@@ -120,30 +280,62 @@ class And(Sentence):
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
-    def formula(self):
+    def evaluate_partial(self, model):
+        result = True
+        for conjunct in self.conjuncts:
+            value = conjunct.evaluate_partial(model)
+            if value is False:
+                return False
+            if value is None:
+                result = None
+        return result
+
+    def write_formula(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+    def collect_symbols(self):
+        return set().union(
+            *[conjunct.symbols() for conjunct in self.conjuncts]
+        )
+
+    def expression(self, index):
+        if not self.conjuncts:
+            return "True"
+        return "(" + " and ".join(
+            conjunct.expression(index) for conjunct in self.conjuncts
+        ) + ")"
 
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
+    def __new__(cls, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
+        return cls.make(*disjuncts)
+
+    def build(self, *disjuncts):
+        self.set(disjuncts=list(disjuncts))
 
     def __eq__(self, other):
         return isinstance(other, Or) and self.disjuncts == other.disjuncts
 
-    def __hash__(self):
+    __hash__ = Sentence.__hash__
+
+    def hash_operands(self):
         return hash(
             ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
         )
 
+    def operands(self):
+        return tuple(self.disjuncts)
+
+    def collect_symbols(self):
+        return set().union(
+            *[disjunct.symbols() for disjunct in self.disjuncts]
+        )
+
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
         return f"Or({disjuncts})"
@@ -151,30 +343,56 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
-    def formula(self):
+    def evaluate_partial(self, model):
+        result = False
+        for disjunct in self.disjuncts:
+            value = disjunct.evaluate_partial(model)
+            if value is True:
+                return True
+            if value is None:
+                result = None
+        return result
+
+    def write_formula(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+    def expression(self, index):
+        if not self.disjuncts:
+            return "False"
+        return "(" + " or ".join(
+            disjunct.expression(index) for disjunct in self.disjuncts
+        ) + ")"
 
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+    def __new__(cls, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
+        return cls.make(antecedent, consequent)
+
+    def build(self, antecedent, consequent):
+        self.set(antecedent=antecedent, consequent=consequent)
 
     def __eq__(self, other):
         return (isinstance(other, Implication)
                 and self.antecedent == other.antecedent
                 and self.consequent == other.consequent)
 
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+    __hash__ = Sentence.__hash__
+
+    def hash_operands(self):
+        return hash(("implies", hash(self.antecedent),
+                     hash(self.consequent)))
+
+    def operands(self):
+        return (self.antecedent, self.consequent)
+
+    def collect_symbols(self):
+        return set.union(self.antecedent.symbols(),
+                         self.consequent.symbols())
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -183,30 +401,53 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
-    def formula(self):
+    def evaluate_partial(self, model):
+        antecedent = self.antecedent.evaluate_partial(model)
+        if antecedent is False:
+            return True
+        consequent = self.consequent.evaluate_partial(model)
+        if consequent is True:
+            return True
+        if antecedent is None or consequent is None:
+            return None
+        return False
+
+    def write_formula(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+    def expression(self, index):
+        antecedent = self.antecedent.expression(index)
+        consequent = self.consequent.expression(index)
+        return f"(not {antecedent} or {consequent})"
 
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
+    def __new__(cls, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
+        return cls.make(left, right)
+
+    def build(self, left, right):
+        self.set(left=left, right=right)
 
     def __eq__(self, other):
         return (isinstance(other, Biconditional)
                 and self.left == other.left
                 and self.right == other.right)
 
-    def __hash__(self):
+    __hash__ = Sentence.__hash__
+
+    def hash_operands(self):
         return hash(("biconditional", hash(self.left), hash(self.right)))
 
+    def operands(self):
+        return (self.left, self.right)
+
+    def collect_symbols(self):
+        return set.union(self.left.symbols(), self.right.symbols())
+
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
 
@@ -216,20 +457,50 @@ class Biconditional(Sentence):
                 or (not self.left.evaluate(model)
                     and not self.right.evaluate(model)))
 
-    def formula(self):
+    def evaluate_partial(self, model):
+        left = self.left.evaluate_partial(model)
+        right = self.right.evaluate_partial(model)
+        if left is None or right is None:
+            return None
+        return left == right
+
+    def write_formula(self):
         left = Sentence.parenthesize(str(self.left))
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
+    def expression(self, index):
+        left = self.left.expression(index)
+        right = self.right.expression(index)
+        return f"({left} == {right})"
 
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+def model_check(knowledge, query, backend="enumerate"):
+    """
+    Checks if knowledge base entails query, using one of the BACKENDS.
+    They all give the same answer, and differ only in speed.
+    """
+    return BACKENDS[backend](knowledge, query)
+
+
+def enumerate_models(knowledge, query, stats=None, prune=True):
+    """
+    Checks if knowledge base entails query.
+
+    With prune, each branch first assigns every symbol the knowledge base
+    forces, stops as soon as the knowledge base or query is decided
+    under the partial model, and branches on the most constrained symbol
+    left. Without it, every model is checked, as in the lecture. stats,
+    if given, counts the "nodes" checked, the symbols "forced" and the
+    branches "pruned" before every symbol was assigned.
+    """
+    if stats is None:
+        stats = {}
+    stats.update(nodes=0, forced=0, pruned=0)
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
+        stats["nodes"] += 1
 
         # If model has an assignment for each symbol
         if not symbols:
@@ -260,4 +531,136 @@ def model_check(knowledge, query):
     symbols = set.union(knowledge.symbols(), query.symbols())
 
     # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+    if not prune:
+        return check_all(knowledge, query, symbols, dict())
+
+    # The knowledge base as a list of conjuncts with their symbols
+    conjuncts = []
+    pending = [knowledge]
+    while pending:
+        sentence = pending.pop()
+        if isinstance(sentence, And):
+            pending.extend(reversed(sentence.conjuncts))
+        else:
+            conjuncts.append((sentence, sentence.symbols()))
+
+    def propagate(model):
+        """
+        Assigns in model every symbol that is the last one unassigned in
+        a conjunct, and that the conjunct is false for one value of.
+        Returns False if some conjunct is false for both.
+        """
+        changed = True
+        while changed:
+            changed = False
+            for conjunct, names in conjuncts:
+                free = [name for name in names if name not in model]
+                if len(free) != 1:
+                    continue
+                p = free[0]
+                values = []
+                for value in (True, False):
+                    model[p] = value
+                    if conjunct.evaluate_partial(model) is not False:
+                        values.append(value)
+                del model[p]
+                if not values:
+                    return False
+                if len(values) == 1:
+                    model[p] = values[0]
+                    stats["forced"] += 1
+                    changed = True
+        return True
+
+    def most_constrained(model):
+        """
+        Returns a symbol of the undecided conjunct with the fewest
+        unassigned symbols, picking the one in the most undecided
+        conjuncts, or any unassigned symbol if no conjunct is undecided.
+        Returns None if every symbol is assigned.
+        """
+        undecided = []
+        for conjunct, names in conjuncts:
+            free = [name for name in names if name not in model]
+            if free and conjunct.evaluate_partial(model) is None:
+                undecided.append(free)
+        if not undecided:
+            return min((p for p in symbols if p not in model), default=None)
+        occurrences = {}
+        for free in undecided:
+            for p in free:
+                occurrences[p] = occurrences.get(p, 0) + 1
+        return max(min(undecided, key=len), key=occurrences.get)
+
+    def check_partial(model):
+        """Checks if knowledge base entails query, given a partial model."""
+        stats["nodes"] += 1
+        model = model.copy()
+        known = propagate(model) and knowledge.evaluate_partial(model)
+        if known is False:
+            # No model extending this one is a model of the knowledge base
+            entailed = True
+        else:
+            entailed = query.evaluate_partial(model)
+            if entailed is None or (entailed is False and known is None):
+                p = most_constrained(model)
+                if p is None:
+                    # Nothing left to branch on, so evaluate in full
+                    return not knowledge.evaluate(model) or bool(
+                        query.evaluate(model)
+                    )
+                return (check_partial({**model, p: True}) and
+                        check_partial({**model, p: False}))
+        if len(model) < len(symbols):
+            stats["pruned"] += 1
+        return entailed
+
+    return check_partial(dict())
+
+
+def compiled_models(knowledge, query):
+    """
+    Checks if knowledge base entails query by compiling both into
+    functions of an int model and counting through every model.
+    """
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    knowledge = knowledge.compile(symbols)
+    query = query.compile(symbols)
+    return all(query(m) for m in range(1 << len(symbols)) if knowledge(m))
+
+
+def bit_parallel_models(knowledge, query):
+    """
+    Checks if knowledge base entails query on blocks of models packed
+    64 to a machine word. Needs NumPy.
+    """
+    from bitparallel import entails
+    return entails(knowledge, query)
+
+
+def sat_models(knowledge, query):
+    """
+    Checks if knowledge base entails query by asking a SAT solver whether
+    the knowledge base and the negation of the query have a model.
+    """
+    from sat import entails
+    return entails(knowledge, query)
+
+
+def bdd_models(knowledge, query):
+    """
+    Checks if knowledge base entails query by compiling both into binary
+    decision diagrams.
+    """
+    from bdd import entails
+    return entails(knowledge, query)
+
+
+# Ways model_check can check entailment, by name
+BACKENDS = {
+    "enumerate": enumerate_models,
+    "compiled": compiled_models,
+    "bit-parallel": bit_parallel_models,
+    "sat": sat_models,
+    "bdd": bdd_models,
+}
@@ -1,4 +1,5 @@
 from logic import *
+from session import ModelSession
 
 AKnight = Symbol("A is a Knight")
 AKnave = Symbol("A is a Knave")
@@ -119,8 +120,10 @@ def main():
             print("    Not yet implemented.")
         else:
             print("fuck")
+            # Enumerate the puzzle's models once for all six questions
+            session = ModelSession(knowledge)
             for symbol in symbols:
-                if model_check(knowledge, symbol):
+                if session.entails(symbol):
 
                     print(f"    {symbol}")
 
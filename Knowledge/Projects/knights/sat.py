@@ -0,0 +1,392 @@
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+# Literals are nonzero ints, as in the DIMACS format: variable v is the
+# literal v, and its negation -v.
+
+
+class Solver():
+    """
+    CDCL SAT solver over clauses of int literals.
+
+    Each clause watches two of its literals, and is only looked at when
+    one of them becomes false, so unit propagation does not scan every
+    clause. A conflict is analysed back to its first unique implication
+    point, the learned clause is kept, and the search jumps back to the
+    level where that clause asserts its literal. Variables are chosen by
+    activity, bumped when they take part in conflicts, and restarts
+    follow the Luby sequence. solve takes assumptions, so one solver can
+    answer many queries while keeping what it has learned.
+    """
+
+    def __init__(self):
+        self.clauses = []
+        self.watches = {}
+        self.values = [None]
+        self.levels = [0]
+        self.reasons = [None]
+        self.activity = [0.0]
+        self.phases = [False]
+        self.increment = 1.0
+        self.trail = []
+        self.trail_limits = []
+        self.head = 0
+        self.ok = True
+        self.model = None
+        self.conflicts = 0
+        self.decisions = 0
+
+    def new_variable(self):
+        """Returns a fresh variable."""
+        self.values.append(None)
+        self.levels.append(0)
+        self.reasons.append(None)
+        self.activity.append(0.0)
+        self.phases.append(False)
+        variable = len(self.values) - 1
+        self.watches[variable] = []
+        self.watches[-variable] = []
+        return variable
+
+    def value(self, literal):
+        """Returns True, False or None if the literal is unassigned."""
+        value = self.values[abs(literal)]
+        if value is None or literal > 0:
+            return value
+        return not value
+
+    def level(self):
+        return len(self.trail_limits)
+
+    def add_clause(self, literals):
+        """
+        Adds a clause, which must only be done between calls to solve.
+        Returns False if the clauses have become unsatisfiable.
+        """
+        if not self.ok:
+            return False
+        clause = []
+        for literal in literals:
+            value = self.value(literal)
+            if value is True or -literal in clause:
+                return True
+            if value is None and literal not in clause:
+                clause.append(literal)
+
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self.assign(clause[0], None)
+            self.ok = self.propagate() is None
+        else:
+            self.watch(clause)
+        return self.ok
+
+    def watch(self, clause):
+        """Stores a clause, watching its first two literals."""
+        self.clauses.append(clause)
+        index = len(self.clauses) - 1
+        self.watches[clause[0]].append(index)
+        self.watches[clause[1]].append(index)
+        return index
+
+    def assign(self, literal, reason):
+        variable = abs(literal)
+        self.values[variable] = literal > 0
+        self.levels[variable] = self.level()
+        self.reasons[variable] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Assigns every literal forced by a clause with one unassigned
+        literal left. Returns the index of a clause made false, or None.
+        """
+        while self.head < len(self.trail):
+            false = -self.trail[self.head]
+            self.head += 1
+            watching = self.watches[false]
+            kept = []
+            conflict = None
+            for n, index in enumerate(watching):
+                clause = self.clauses[index]
+
+                # Keep the false literal second, so clause[0] is the one
+                # implied if nothing else can be watched
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], false
+                if self.value(clause[0]) is True:
+                    kept.append(index)
+                    continue
+
+                for k in range(2, len(clause)):
+                    if self.value(clause[k]) is not False:
+                        clause[1], clause[k] = clause[k], false
+                        self.watches[clause[1]].append(index)
+                        break
+                else:
+                    kept.append(index)
+                    if self.value(clause[0]) is False:
+                        conflict = index
+                        kept.extend(watching[n + 1:])
+                        break
+                    self.assign(clause[0], index)
+            self.watches[false] = kept
+            if conflict is not None:
+                return conflict
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns the clause learned from a conflict, asserting literal
+        first, and the level to jump back to.
+        """
+        learned = [None]
+        seen = set()
+        pending = 0
+        literal = None
+        position = len(self.trail) - 1
+        clause = self.clauses[conflict]
+        while True:
+            for other in (clause if literal is None else clause[1:]):
+                variable = abs(other)
+                if variable in seen or self.levels[variable] == 0:
+                    continue
+                seen.add(variable)
+                self.bump(variable)
+                if self.levels[variable] == self.level():
+                    pending += 1
+                else:
+                    learned.append(other)
+
+            # Walk back along the trail to the next literal in the conflict
+            while abs(self.trail[position]) not in seen:
+                position -= 1
+            literal = self.trail[position]
+            position -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.clauses[self.reasons[abs(literal)]]
+
+        learned[0] = -literal
+        back = 0
+        if len(learned) > 1:
+            # Watch the literal from the deepest remaining level second
+            deepest = max(range(1, len(learned)),
+                          key=lambda k: self.levels[abs(learned[k])])
+            learned[1], learned[deepest] = learned[deepest], learned[1]
+            back = self.levels[abs(learned[1])]
+        return learned, back
+
+    def bump(self, variable):
+        self.activity[variable] += self.increment
+        if self.activity[variable] > 1e100:
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.increment *= 1e-100
+
+    def backtrack(self, level):
+        """Undoes every assignment made above `level`."""
+        if self.level() <= level:
+            return
+        start = self.trail_limits[level]
+        for literal in self.trail[start:]:
+            variable = abs(literal)
+            self.phases[variable] = literal > 0
+            self.values[variable] = None
+            self.reasons[variable] = None
+        del self.trail[start:]
+        del self.trail_limits[level:]
+        self.head = len(self.trail)
+
+    def decide(self):
+        """Returns the unassigned variable with the most activity, or None."""
+        best = None
+        for variable in range(1, len(self.values)):
+            if self.values[variable] is None and (
+                best is None or self.activity[variable] > self.activity[best]
+            ):
+                best = variable
+        return best
+
+    def solve(self, assumptions=()):
+        """
+        Returns True if the clauses, with every literal in assumptions
+        true, are satisfiable, keeping a satisfying assignment in `model`.
+        """
+        self.model = None
+        if not self.ok:
+            return False
+        restarts = 0
+        budget = 100 * luby(restarts)
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                budget -= 1
+                if self.level() == 0:
+                    self.ok = False
+                    return False
+                learned, back = self.analyze(conflict)
+                self.backtrack(back)
+                if len(learned) == 1:
+                    self.assign(learned[0], None)
+                else:
+                    self.assign(learned[0], self.watch(learned))
+                self.increment /= 0.95
+                continue
+
+            if budget <= 0:
+                restarts += 1
+                budget = 100 * luby(restarts)
+                self.backtrack(0)
+                continue
+
+            # Assumptions are decided first, one level each
+            if self.level() < len(assumptions):
+                literal = assumptions[self.level()]
+                value = self.value(literal)
+                if value is False:
+                    self.backtrack(0)
+                    return False
+                self.trail_limits.append(len(self.trail))
+                if value is None:
+                    self.assign(literal, None)
+                continue
+
+            variable = self.decide()
+            if variable is None:
+                self.model = self.values[:]
+                self.backtrack(0)
+                return True
+            self.decisions += 1
+            self.trail_limits.append(len(self.trail))
+            self.assign(variable if self.phases[variable] else -variable,
+                        None)
+
+
+def luby(i):
+    """Returns the i-th term (from 0) of the Luby sequence 1 1 2 1 1 2 4..."""
+    size, power = 1, 0
+    while size < i + 1:
+        power += 1
+        size = 2 * size + 1
+    while size - 1 != i:
+        size = (size - 1) // 2
+        power -= 1
+        i = i % size
+    return 2 ** power
+
+
+class Encoder():
+    """
+    Tseitin encoding of sentences into the clauses of a Solver.
+
+    Each subsentence gets a literal whose clauses make it equal to the
+    subsentence, so the clauses grow linearly with the sentence rather
+    than exponentially as in distributing Or over And. Equal subsentences
+    share a literal, and symbols keep the same variable across sentences.
+    """
+
+    def __init__(self, solver=None):
+        self.solver = Solver() if solver is None else solver
+        self.variables = {}
+        self.literals = {}
+        self.true = None
+
+    def variable(self, name):
+        """Returns the variable of a symbol name."""
+        if name not in self.variables:
+            self.variables[name] = self.solver.new_variable()
+        return self.variables[name]
+
+    def constant(self, value):
+        """Returns a literal that is always `value`."""
+        if self.true is None:
+            self.true = self.solver.new_variable()
+            self.solver.add_clause([self.true])
+        return self.true if value else -self.true
+
+    def literal(self, sentence):
+        """Returns a literal equal to the sentence, adding its clauses."""
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if sentence in self.literals:
+            return self.literals[sentence]
+
+        clause = self.solver.add_clause
+        if isinstance(sentence, (And, Or)):
+            conjunction = isinstance(sentence, And)
+            operands = (sentence.conjuncts if conjunction
+                        else sentence.disjuncts)
+            if not operands:
+                return self.constant(conjunction)
+            if len(operands) == 1:
+                return self.literal(operands[0])
+
+            # For Or, encode the And of the negated operands and negate it
+            sign = 1 if conjunction else -1
+            parts = [sign * self.literal(operand) for operand in operands]
+            x = self.solver.new_variable()
+            for part in parts:
+                clause([-x, part])
+            clause([x] + [-part for part in parts])
+            literal = sign * x
+        elif isinstance(sentence, Implication):
+            a = self.literal(sentence.antecedent)
+            b = self.literal(sentence.consequent)
+            literal = self.solver.new_variable()
+            clause([-literal, -a, b])
+            clause([literal, a])
+            clause([literal, -b])
+        elif isinstance(sentence, Biconditional):
+            a = self.literal(sentence.left)
+            b = self.literal(sentence.right)
+            literal = self.solver.new_variable()
+            clause([-literal, -a, b])
+            clause([-literal, a, -b])
+            clause([literal, a, b])
+            clause([literal, -a, -b])
+        else:
+            raise Exception("nothing to encode")
+        self.literals[sentence] = literal
+        return literal
+
+    def add(self, sentence):
+        """
+        Adds the sentence as true. Conjunctions are split, and
+        disjunctions of literals become clauses directly, without any
+        new variables.
+        """
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or) and all(
+            isinstance(disjunct, Symbol) or (
+                isinstance(disjunct, Not)
+                and isinstance(disjunct.operand, Symbol)
+            )
+            for disjunct in sentence.disjuncts
+        ):
+            self.solver.add_clause(
+                [self.literal(disjunct) for disjunct in sentence.disjuncts]
+            )
+        elif isinstance(sentence, Implication):
+            self.add(Or(Not(sentence.antecedent), sentence.consequent))
+        else:
+            self.solver.add_clause([self.literal(sentence)])
+
+    def entails(self, query):
+        """
+        Checks if the sentences added entail query: that they are
+        unsatisfiable together with the negation of query.
+        """
+        return not self.solver.solve([-self.literal(query)])
+
+
+def entails(knowledge, query):
+    """Checks if knowledge base entails query with a SAT solver."""
+    encoder = Encoder()
+    encoder.add(knowledge)
+    return encoder.entails(query)
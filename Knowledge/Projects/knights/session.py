@@ -0,0 +1,174 @@
+from abc import ABC, abstractmethod
+
+from bdd import BDD, TRUE
+from logic import And, Not, Sentence
+from sat import Encoder
+
+
+class Session(ABC):
+    """
+    A knowledge base that answers many entailment queries, keeping the
+    work done for one query for the next.
+
+    Sentences are added as with And.add, and each backend updates what
+    it has compiled as they arrive instead of starting again, so the
+    knowledge can grow between queries. The session keeps its own copy of
+    the conjuncts of an And it is given, so later additions must go
+    through session.add: adding to the caller's And does not reach it.
+    """
+
+    def __init__(self, knowledge=None):
+        self.knowledge = And()
+        if knowledge is not None:
+            self.add(knowledge)
+
+    def add(self, sentence):
+        """Adds a sentence to the knowledge base."""
+        Sentence.validate(sentence)
+        if isinstance(sentence, And):
+            # Copy the conjuncts, as the caller may add to its And later
+            sentence = And(*sentence.conjuncts)
+            for conjunct in sentence.conjuncts:
+                self.knowledge.add(conjunct)
+        else:
+            self.knowledge.add(sentence)
+        self.extend(sentence)
+
+    @abstractmethod
+    def extend(self, sentence):
+        """Updates the compiled knowledge with a new sentence."""
+
+    @abstractmethod
+    def entails(self, query):
+        """Checks if the knowledge base entails query."""
+
+    def ask(self, query):
+        """
+        Returns True if the knowledge base entails query, False if it
+        entails its negation, and None if it could be either.
+        """
+        if self.entails(query):
+            return True
+        if self.entails(Not(query)):
+            return False
+        return None
+
+
+class ModelSession(Session):
+    """
+    Keeps every model of the knowledge base, as ints whose bit i is the
+    value of symbols[i], so a query is one compiled check per model.
+
+    Each sentence added filters the models. A sentence with new symbols
+    first splits every model into one for each assignment of them, so
+    adding a large knowledge base a conjunct at a time keeps the models
+    few instead of enumerating all 2 ** n assignments at once.
+    """
+
+    def __init__(self, knowledge=None):
+        self.symbols = []
+        self.index = {}
+        self.models = [0]
+        super().__init__(knowledge)
+
+    def extend(self, sentence):
+        if isinstance(sentence, And):
+            # Add first the conjuncts bringing in the fewest new symbols,
+            # so each one filters the models before the next multiplies
+            # them
+            pending = list(sentence.conjuncts)
+            while pending:
+                conjunct = min(pending, key=lambda conjunct: len(
+                    conjunct.symbols() - self.index.keys()
+                ))
+                pending.remove(conjunct)
+                self.extend(conjunct)
+            return
+
+        new = sorted(sentence.symbols() - self.index.keys())
+        if new:
+            n = len(self.symbols)
+            self.models = [model | extra << n for model in self.models
+                           for extra in range(1 << len(new))]
+            for symbol in new:
+                self.index[symbol] = len(self.symbols)
+                self.symbols.append(symbol)
+
+        holds = sentence.compile(self.symbols)
+        self.models = [model for model in self.models if holds(model)]
+
+    def entails(self, query):
+        # Symbols the knowledge base never mentions can take either value
+        extra = sorted(query.symbols() - self.index.keys())
+        holds = query.compile(self.symbols + extra)
+        n = len(self.symbols)
+        return all(holds(model | values << n) for model in self.models
+                   for values in range(1 << len(extra)))
+
+    def count(self):
+        """Returns the number of models of the knowledge base."""
+        return len(self.models)
+
+
+class SatSession(Session):
+    """
+    Keeps one SAT solver for the knowledge base. Sentences added become
+    more clauses, and every query is solved under an assumption, so the
+    clauses learned answering one query help with the next.
+    """
+
+    def __init__(self, knowledge=None):
+        self.encoder = Encoder()
+        super().__init__(knowledge)
+
+    def extend(self, sentence):
+        self.encoder.add(sentence)
+
+    def entails(self, query):
+        return self.encoder.entails(query)
+
+
+class BddSession(Session):
+    """
+    Compiles the knowledge base into one binary decision diagram,
+    conjoining each sentence as it is added. Queries share its node table
+    and operation cache, so once the knowledge is compiled a query costs
+    time in the size of the diagrams, not the number of models.
+    """
+
+    def __init__(self, knowledge=None):
+        self.bdd = BDD()
+        self.root = TRUE
+        super().__init__(knowledge)
+
+    def extend(self, sentence):
+        self.root = self.bdd.conjoin(self.root, self.bdd.compile(sentence))
+
+    def entails(self, query):
+        return self.bdd.entails(self.root, self.bdd.compile(query))
+
+    def count(self):
+        """Returns the number of models of the knowledge base."""
+        # Symbols only queries mention double the count for each of them
+        extra = len(self.bdd.symbols) - len(self.knowledge.symbols())
+        return self.bdd.count(self.root) >> extra
+
+    def forced(self):
+        """
+        Returns {symbol: value} for every symbol of the knowledge base
+        that it forces, or None if it has no models.
+        """
+        forced = self.bdd.forced(self.root)
+        if forced is None:
+            return None
+        symbols = self.knowledge.symbols()
+        return {symbol: value for symbol, value in forced.items()
+                if symbol in symbols}
+
+
+# Kinds of session, by name
+SESSIONS = {
+    "models": ModelSession,
+    "sat": SatSession,
+    "bdd": BddSession,
+}
@@ -0,0 +1,195 @@
+import argparse
+import math
+import random
+import time
+import tracemalloc
+from collections import deque
+
+from search import ALGORITHMS, INFORMED, Node, breadth_first
+
+# Moves between grid cells, as (action, row step, column step)
+MOVES = (("up", -1, 0), ("down", 1, 0), ("left", 0, -1), ("right", 0, 1))
+
+
+class GridMaze():
+    """
+    A square maze of open cells and walls, numbered row by row, so a
+    state is the single int row * side + column.
+
+    The maze is carved by a randomized depth-first walk, which leaves
+    exactly one path between any two cells. Knocking out a fraction
+    `loops` of the remaining inner walls then adds cycles, so the
+    searches have more than one way to the goal.
+    """
+
+    def __init__(self, cells, seed=0, loops=0.1):
+        side = max(5, math.isqrt(cells))
+        if side % 2 == 0:
+            side -= 1
+        self.side = side
+        self.open = bytearray(side * side)
+        rng = random.Random(seed)
+
+        # Carve passages between the cells at odd coordinates
+        self.open[side + 1] = 1
+        stack = [(1, 1)]
+        while stack:
+            row, column = stack[-1]
+            unvisited = [
+                (row + 2 * dr, column + 2 * dc)
+                for _, dr, dc in MOVES
+                if 0 < row + 2 * dr < side and 0 < column + 2 * dc < side
+                and not self.open[(row + 2 * dr) * side + column + 2 * dc]
+            ]
+            if not unvisited:
+                stack.pop()
+                continue
+            r, c = rng.choice(unvisited)
+            self.open[((row + r) // 2) * side + (column + c) // 2] = 1
+            self.open[r * side + c] = 1
+            stack.append((r, c))
+
+        for row in range(1, side - 1):
+            for column in range(1 + row % 2, side - 1, 2):
+                if rng.random() < loops:
+                    self.open[row * side + column] = 1
+
+        self.start = side + 1
+        self.goal = (side - 2) * side + side - 2
+
+    def neighbors(self, state):
+        """Returns (action, state) pairs for the open cells next to state."""
+        side = self.side
+        result = []
+        for action, dr, dc in MOVES:
+            # The border is all wall, so no move from an open cell leaves
+            # the grid
+            neighbor = state + dr * side + dc
+            if self.open[neighbor]:
+                result.append((action, neighbor))
+        return result
+
+    def manhattan(self, state):
+        """Returns the number of steps to the goal if there were no walls."""
+        row, column = divmod(state, self.side)
+        goal_row, goal_column = divmod(self.goal, self.side)
+        return abs(row - goal_row) + abs(column - goal_column)
+
+
+class DictNode():
+    """The lecture code's Node, with a __dict__, for comparison."""
+
+    def __init__(self, state, parent=None, action=None):
+        self.state = state
+        self.parent = parent
+        self.action = action
+
+
+def node_breadth_first(start, goal, neighbors, node_class, stats=None):
+    """
+    Breadth-first search that makes a node for every state it reaches,
+    as the lecture code does, for comparison with the parent arrays.
+    """
+    stats.update(expanded=0)
+    frontier = deque([node_class(start, None, None)])
+    frontier_states = {start}
+    explored = set()
+    while frontier:
+        node = frontier.popleft()
+        frontier_states.discard(node.state)
+        explored.add(node.state)
+        stats["expanded"] += 1
+        for action, state in neighbors(node.state):
+            if state in explored or state in frontier_states:
+                continue
+            child = node_class(state, node, action)
+            if state == goal:
+                path = []
+                while child.parent is not None:
+                    path.append((child.action, child.state))
+                    child = child.parent
+                return path[::-1]
+            frontier.append(child)
+            frontier_states.add(state)
+    return None
+
+
+# Breadth-first searches compared by --memory, as functions of a maze and
+# the stats dict to fill
+MEMORY_SEARCHES = {
+    "dict nodes": lambda maze, stats: node_breadth_first(
+        maze.start, maze.goal, maze.neighbors, DictNode, stats),
+    "slots nodes": lambda maze, stats: node_breadth_first(
+        maze.start, maze.goal, maze.neighbors, Node, stats),
+    "interned ids": lambda maze, stats: breadth_first(
+        maze.start, maze.goal, maze.neighbors, stats),
+    "dense arrays": lambda maze, stats: breadth_first(
+        maze.start, maze.goal, maze.neighbors, stats, size=maze.side ** 2),
+}
+
+
+def memory_main(args):
+    print(f"{'cells':>10}  {'search':<15}{'expanded':>10}{'peak MB':>9}"
+          f"{'bytes/state':>13}")
+    for cells in args.cells:
+        maze = GridMaze(cells, args.seed, args.loops)
+        for name, search in MEMORY_SEARCHES.items():
+            stats = {}
+            tracemalloc.start()
+            search(maze, stats)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            expanded = stats["expanded"]
+            print(f"{maze.side ** 2:>10}  {name:<15}{expanded:>10}"
+                  f"{peak / 1e6:>9.1f}{peak / max(expanded, 1):>13.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the search algorithms on grid mazes."
+    )
+    parser.add_argument("--cells", type=int, nargs="+",
+                        default=[10 ** 2, 10 ** 4, 10 ** 6],
+                        help="number of grid cells in each maze")
+    parser.add_argument("--algorithms", nargs="+", choices=list(ALGORITHMS),
+                        default=list(ALGORITHMS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--loops", type=float, default=0.1,
+                        help="fraction of inner walls knocked out")
+    parser.add_argument("--ids-cells", type=int, default=10 ** 4,
+                        help="largest maze iterative deepening is run on")
+    parser.add_argument("--memory", action="store_true",
+                        help="compare the memory used per expanded state "
+                             "by node and parent array searches instead")
+    args = parser.parse_args()
+    if args.memory:
+        memory_main(args)
+        return
+
+    print(f"{'cells':>10}  {'search':<8}{'steps':>8}{'expanded':>10}"
+          f"{'peak':>9}{'seconds':>10}")
+    for cells in args.cells:
+        start = time.perf_counter()
+        maze = GridMaze(cells, args.seed, args.loops)
+        print(f"{maze.side ** 2:>10}  maze built in "
+              f"{time.perf_counter() - start:.2f}s")
+        for name in args.algorithms:
+            # Iterative deepening repeats its search once per step of the
+            # path, which is far too slow on the largest mazes
+            if name == "ids" and cells > args.ids_cells:
+                continue
+            search = ALGORITHMS[name]
+            extra = (maze.manhattan,) if name in INFORMED else ()
+            stats = {}
+            start = time.perf_counter()
+            path = search(maze.start, maze.goal, maze.neighbors, *extra,
+                          stats=stats, size=maze.side ** 2)
+            seconds = time.perf_counter() - start
+            steps = "-" if path is None else len(path)
+            print(f"{maze.side ** 2:>10}  {name:<8}{steps:>8}"
+                  f"{stats['expanded']:>10}{stats['frontier peak']:>9}"
+                  f"{seconds:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,10 @@ import sys
 # : is similar to { but it doesn't need to be closed
 # if something is indented it indicates it is surrounded by {}
 class Node():
+    # __slots__ stores the attributes in fixed slots instead of a __dict__,
+    # which makes every node much smaller
+    __slots__ = ("state", "action", "goal")
+
     def __init__(self, state, action, goal):
         self.state = state
         self.action = action
@@ -48,12 +52,13 @@ class QueueFrontier(StackFrontier):
             return removed_node
 
 
-#main
-queue = QueueFrontier()
-node = Node(state=1,action=0,goal=3)
-queue.add(node)
-queue.add(node)
-print(queue.remove().state)
+#main, only when run as a script so the classes can be imported
+if __name__ == "__main__":
+    queue = QueueFrontier()
+    node = Node(state=1,action=0,goal=3)
+    queue.add(node)
+    queue.add(node)
+    print(queue.remove().state)
 
 
 
@@ -0,0 +1,321 @@
+import argparse
+import time
+
+import numpy as np
+
+from search import ALGORITHMS, INFORMED
+
+# Moves between grid cells, as (action, row step, column step), in the
+# order their numbers are stored in a search's `came` array
+MOVES = (("up", -1, 0), ("down", 1, 0), ("left", 0, -1), ("right", 0, 1))
+
+# Colours used when rendering a maze, as RGB
+WALL = (40, 40, 40)
+OPEN = (237, 240, 252)
+EXPLORED = (212, 97, 85)
+PATH = (220, 235, 113)
+START = (255, 0, 0)
+GOAL = (0, 171, 28)
+
+
+class Maze():
+    """
+    A grid of open cells and walls, loaded from text or an image.
+
+    Walls are a NumPy boolean array with a border of walls added around
+    the grid, so no move from an open cell leaves it. Cells are numbered
+    row by row over that padded grid, so a state is a single int and a
+    move is adding one of `steps` to it. This is what lets a whole layer
+    of the search find its neighbors with a few array operations.
+    """
+
+    def __init__(self, walls, start, goal):
+        walls = np.asarray(walls, dtype=bool)
+        self.height, self.width = walls.shape
+        self.walls = np.pad(walls, 1, constant_values=True)
+        self.open = ~self.walls.ravel()
+        side = self.width + 2
+        self.steps = np.array([dr * side + dc for _, dr, dc in MOVES])
+        self.start = self.state_of(start)
+        self.goal = self.state_of(goal)
+        for name, state in (("start", self.start), ("goal", self.goal)):
+            if not self.open[state]:
+                raise Exception(f"maze {name} is a wall")
+
+        # Filled in by the last search
+        self.solution = None
+        self.explored = None
+
+    @classmethod
+    def from_text(cls, path):
+        """
+        Loads a maze drawn in text, with # for walls, A for the start and
+        B for the goal. Short lines are padded with walls.
+        """
+        with open(path) as f:
+            lines = f.read().splitlines()
+        contents = "".join(lines)
+        if contents.count("A") != 1:
+            raise Exception("maze must have exactly one start point")
+        if contents.count("B") != 1:
+            raise Exception("maze must have exactly one goal")
+
+        width = max(map(len, lines))
+        grid = np.array([list(line.ljust(width, "#")) for line in lines])
+        start = np.argwhere(grid == "A")[0]
+        goal = np.argwhere(grid == "B")[0]
+        return cls(grid == "#", tuple(start), tuple(goal))
+
+    @classmethod
+    def from_image(cls, path, start=None, goal=None):
+        """
+        Loads a maze from an image, where dark pixels are walls. Unless
+        given as (row, column), the start is the red pixel and the goal
+        the green one, as drawn by render.
+        """
+        from PIL import Image
+
+        pixels = np.asarray(Image.open(path).convert("RGB"), dtype=np.int32)
+        red, green, blue = pixels[..., 0], pixels[..., 1], pixels[..., 2]
+        walls = (red * 299 + green * 587 + blue * 114) < 128 * 1000
+
+        for name, mask, given in (
+            ("start", (red > 200) & (green < 80) & (blue < 80), start),
+            ("goal", (green > 150) & (red < 80) & (blue < 100), goal),
+        ):
+            # The start and goal colours are dark, but they are open cells
+            walls &= ~mask
+            if given is None:
+                found = np.argwhere(mask)
+                if len(found) == 0:
+                    raise Exception(f"maze image has no {name} pixel")
+                given = tuple(found[0])
+            walls[given] = False
+            if name == "start":
+                start = given
+            else:
+                goal = given
+        return cls(walls, start, goal)
+
+    @classmethod
+    def random(cls, height, width, density=0.3, seed=0):
+        """
+        Returns a random occupancy grid with `density` of its cells walls,
+        and the start and goal in opposite corners. The corners are kept
+        clear so the start and goal are not walled in.
+        """
+        rng = np.random.default_rng(seed)
+        walls = rng.random((height, width)) < density
+        walls[:2, :2] = walls[-2:, -2:] = False
+        return cls(walls, (0, 0), (height - 1, width - 1))
+
+    def __len__(self):
+        return self.walls.size
+
+    def state_of(self, cell):
+        """Returns the state of a (row, column) cell."""
+        row, column = cell
+        return (row + 1) * (self.width + 2) + column + 1
+
+    def cell_of(self, state):
+        """Returns the (row, column) cell of a state."""
+        row, column = divmod(int(state), self.width + 2)
+        return (row - 1, column - 1)
+
+    def neighbors(self, state):
+        """
+        Returns (action, state) pairs for the open cells next to one
+        state, for the search package's algorithms.
+        """
+        return [(action, state + step)
+                for (action, _, _), step in zip(MOVES, self.steps.tolist())
+                if self.open[state + step]]
+
+    def neighbors_of_all(self, states):
+        """
+        Returns the open neighbors of an array of states at once, as
+        arrays of (state, neighbor, move number) with one entry per move.
+        """
+        neighbors = (states[:, None] + self.steps).ravel()
+        sources = np.repeat(states, len(self.steps))
+        moves = np.tile(np.arange(len(self.steps)), len(states))
+        reachable = self.open[neighbors]
+        return sources[reachable], neighbors[reachable], moves[reachable]
+
+    def manhattan(self, state):
+        """Returns the number of steps to the goal if there were no walls."""
+        row, column = divmod(state, self.width + 2)
+        goal_row, goal_column = divmod(self.goal, self.width + 2)
+        return abs(row - goal_row) + abs(column - goal_column)
+
+    def breadth_first(self, stats=None):
+        """
+        Finds a shortest path from the start to the goal, expanding a
+        whole layer of the breadth-first search at a time with array
+        operations. Returns the list of (action, (row, column)) pairs
+        from the start to the goal, or None.
+
+        came[state] packs the state it was reached from and the move taken
+        into one number, state * 4 + move, so a single assignment records
+        both. When several cells of a layer reach the same neighbor, one
+        of the writes wins, and the new layer is the neighbors whose entry
+        matches the write that made it.
+        """
+        moves = len(self.steps)
+        dtype = np.int32 if len(self) * moves < 2 ** 31 else np.int64
+        came = np.full(len(self), -1, dtype=dtype)
+        came[self.start] = self.start * moves
+        self.explored = np.zeros(len(self), dtype=bool)
+        if stats is not None:
+            stats.update(expanded=0, layers=0)
+
+        layer = np.array([self.start], dtype=dtype)
+        while layer.size and came[self.goal] < 0:
+            self.explored[layer] = True
+            if stats is not None:
+                stats["expanded"] += layer.size
+                stats["layers"] += 1
+            sources, neighbors, steps = self.neighbors_of_all(layer)
+            new = came[neighbors] < 0
+            sources, neighbors = sources[new], neighbors[new]
+            codes = sources * moves + steps[new]
+            came[neighbors] = codes
+            layer = neighbors[came[neighbors] == codes]
+
+        if came[self.goal] < 0:
+            self.solution = None
+            return None
+        path = []
+        state = self.goal
+        while state != self.start:
+            parent, move = divmod(int(came[state]), moves)
+            path.append((MOVES[move][0], self.cell_of(state)))
+            state = parent
+        path.reverse()
+        self.solution = path
+        return path
+
+    def solve(self, algorithm="bfs", stats=None):
+        """
+        Finds a path with one of the search package's algorithms, or the
+        array breadth-first search for "bfs", recording the explored
+        cells for render.
+        """
+        if algorithm == "bfs":
+            return self.breadth_first(stats)
+
+        explored = np.zeros(len(self), dtype=bool)
+
+        def neighbors(state):
+            explored[state] = True
+            return self.neighbors(state)
+
+        extra = (self.manhattan,) if algorithm in INFORMED else ()
+        path = ALGORITHMS[algorithm](self.start, self.goal, neighbors, *extra,
+                                     stats=stats, size=len(self))
+        self.explored = explored
+        self.solution = None if path is None else [
+            (action, self.cell_of(state)) for action, state in path
+        ]
+        return self.solution
+
+    def image(self, show_explored=True):
+        """
+        Returns an (height, width, 3) array of RGB colours for the maze,
+        with the explored cells and solution of the last search.
+        """
+        grid = np.where(self.walls[1:-1, 1:-1, None], WALL, OPEN)
+        grid = grid.astype(np.uint8)
+        if show_explored and self.explored is not None:
+            explored = self.explored.reshape(self.walls.shape)[1:-1, 1:-1]
+            grid[explored] = EXPLORED
+        if self.solution is not None:
+            cells = [cell for _, cell in self.solution]
+            cells = np.array(cells, dtype=int).reshape(-1, 2)
+            grid[cells[:, 0], cells[:, 1]] = PATH
+        grid[self.cell_of(self.start)] = START
+        grid[self.cell_of(self.goal)] = GOAL
+        return grid
+
+    def render(self, filename, show_explored=True, cell_size=1):
+        """Saves the maze as an image, each cell `cell_size` pixels wide."""
+        from PIL import Image
+
+        grid = self.image(show_explored)
+        if cell_size > 1:
+            grid = grid.repeat(cell_size, axis=0).repeat(cell_size, axis=1)
+        Image.fromarray(grid).save(filename)
+
+    def print(self):
+        """Prints the maze as text, with the solution marked by *."""
+        solution = {cell for _, cell in self.solution or []}
+        start, goal = self.cell_of(self.start), self.cell_of(self.goal)
+        for row in range(self.height):
+            line = []
+            for column in range(self.width):
+                cell = (row, column)
+                if self.walls[row + 1, column + 1]:
+                    line.append("#")
+                elif cell == start:
+                    line.append("A")
+                elif cell == goal:
+                    line.append("B")
+                elif cell in solution:
+                    line.append("*")
+                else:
+                    line.append(" ")
+            print("".join(line))
+
+
+def parse_cell(text):
+    """Parses a "row,column" argument."""
+    row, column = text.split(",")
+    return int(row), int(column)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve a grid maze.")
+    parser.add_argument("maze", nargs="?",
+                        help="text maze, or image with dark walls")
+    parser.add_argument("--random", type=int, nargs=2,
+                        metavar=("HEIGHT", "WIDTH"),
+                        help="solve a random occupancy grid instead")
+    parser.add_argument("--density", type=float, default=0.3,
+                        help="fraction of walls in a random grid")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--start", type=parse_cell, metavar="ROW,COLUMN")
+    parser.add_argument("--goal", type=parse_cell, metavar="ROW,COLUMN")
+    parser.add_argument("--search", choices=list(ALGORITHMS), default="bfs")
+    parser.add_argument("--output", help="save an image of the solution")
+    parser.add_argument("--cell-size", type=int, default=1,
+                        help="pixels per cell in the saved image")
+    args = parser.parse_args()
+
+    if args.random:
+        maze = Maze.random(*args.random, args.density, args.seed)
+    elif args.maze is None:
+        parser.error("give a maze file or --random HEIGHT WIDTH")
+    elif args.maze.lower().endswith((".png", ".bmp", ".gif", ".jpg")):
+        maze = Maze.from_image(args.maze, args.start, args.goal)
+    else:
+        maze = Maze.from_text(args.maze)
+    print(f"Maze of {maze.height}x{maze.width} cells.")
+
+    stats = {}
+    start = time.perf_counter()
+    path = maze.solve(args.search, stats)
+    seconds = time.perf_counter() - start
+    if path is None:
+        print("No solution.")
+    else:
+        print(f"Solution of {len(path)} steps.")
+    print(f"Expanded {stats['expanded']} cells in {seconds:.2f}s.")
+    if maze.height * maze.width <= 80 * 80:
+        maze.print()
+    if args.output:
+        maze.render(args.output, cell_size=args.cell_size)
+        print(f"Saved {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+"""
+Reusable search algorithms over a neighbors(state) function.
+
+The searches keep their frontiers as plain deques, stacks and heaps of
+interned state ids, and parent pointers in flat arrays indexed by those
+ids, so they only make nodes, which use __slots__ to keep them small,
+for the path they return.
+"""
+
+from .algorithms import (ALGORITHMS, INFORMED, a_star, best_first,
+                         breadth_first, depth_first, greedy_best_first,
+                         iterative_deepening, uniform_cost)
+from .parents import DenseParents, Node, ParentArrays
+from .stats import new_stats, record_frontier
@@ -0,0 +1,260 @@
+import heapq
+from array import array
+from collections import deque
+from itertools import count
+
+from .parents import new_parents
+from .stats import new_stats, record_frontier
+
+# Every search takes a start state, a goal and a neighbors(state) function
+# that returns (action, state) pairs. The goal is either a goal state or a
+# function that returns True for goal states. A search returns the list of
+# (action, state) pairs leading from the start to a goal, or None if no
+# goal can be reached. If the states are the ints 0 to size - 1, passing
+# `size` keeps the parent pointers in arrays indexed by the states
+# themselves, which saves interning them.
+
+
+def goal_test(goal):
+    """Returns a function telling whether a state is the goal."""
+    if callable(goal):
+        return goal
+    return lambda state: state == goal
+
+
+def unit_cost(state, action, next_state):
+    """Costs 1 for every step, the default for the cost-aware searches."""
+    return 1
+
+
+def breadth_first(start, goal, neighbors, stats=None, size=None):
+    """Finds a path with the fewest steps, searching breadth-first."""
+    return uninformed(start, goal, neighbors, True, stats, size)
+
+
+def depth_first(start, goal, neighbors, stats=None, size=None):
+    """Finds a path, not necessarily the shortest, searching depth-first."""
+    return uninformed(start, goal, neighbors, False, stats, size)
+
+
+def uninformed(start, goal, neighbors, first_in_first_out, stats=None,
+               size=None):
+    """
+    Graph search that expands states in the order they were reached, or
+    the reverse. States are checked against the goal as they are
+    generated, which for breadth-first search still gives a shortest
+    path. The frontier holds interned state ids, and parents are kept in
+    ParentArrays, so no Node is made for states that are never on the
+    path. If `stats` is a dict, the counters from new_stats are stored in
+    it.
+    """
+    is_goal = goal_test(goal)
+    if stats is not None:
+        stats.update(new_stats())
+    if is_goal(start):
+        return []
+
+    parents = new_parents(start, size)
+    frontier = deque([parents.id_of(start)])
+    remove = frontier.popleft if first_in_first_out else frontier.pop
+    while frontier:
+        i = remove()
+        if stats is not None:
+            stats["expanded"] += 1
+        for action, state in neighbors(parents.states[i]):
+            if state in parents:
+                continue
+            child = parents.add(state, i, action)
+            if is_goal(state):
+                return parents.path(child)
+            frontier.append(child)
+        if stats is not None:
+            stats["visited"] = len(parents)
+            record_frontier(stats, len(frontier))
+    return None
+
+
+def iterative_deepening(start, goal, neighbors, max_depth=None, stats=None,
+                        size=None):
+    """
+    Finds a path with the fewest steps by depth-limited depth-first
+    searches with limits 0, 1, 2, ... up to `max_depth`, using memory in
+    proportion to the states reached rather than the whole frontier of a
+    breadth-first search. stats["iterations"] counts the searches run.
+    """
+    is_goal = goal_test(goal)
+    if stats is not None:
+        stats.update(new_stats(), iterations=0)
+
+    limit = 0
+    while max_depth is None or limit <= max_depth:
+        if stats is not None:
+            stats["iterations"] += 1
+        path, cut_off = depth_limited(start, is_goal, neighbors, limit,
+                                      stats, size)
+        if path is not None or not cut_off:
+            return path
+        limit += 1
+    return None
+
+
+def depth_limited(start, is_goal, neighbors, limit, stats=None,
+                  size=None):
+    """
+    Searches depth-first for a goal at most `limit` steps from the start.
+    Returns (path, cut_off), where cut_off tells whether any state was
+    left unexpanded at the limit.
+
+    A state is searched again only when it is reached in fewer steps
+    than before, so every state within the limit is tried at its
+    shallowest depth without paths being enumerated exponentially. Stack
+    entries for a state reached again more shallowly are skipped.
+
+    A state left at the limit may later be reached in fewer steps and
+    expanded after all, so the states that hit the limit are only checked
+    once the search is done: the search was cut off if one of them is
+    still at the limit and has a neighbor that was never reached.
+    """
+    parents = new_parents(start, size)
+    depth = array("i", [0]) * (size or 1)
+    stack = [(parents.id_of(start), 0)]
+    at_limit = []
+    while stack:
+        i, d = stack.pop()
+        if d != depth[i]:
+            continue
+        if is_goal(parents.states[i]):
+            return parents.path(i), bool(at_limit)
+        if d == limit:
+            at_limit.append(i)
+            continue
+        if stats is not None:
+            stats["expanded"] += 1
+        for action, state in neighbors(parents.states[i]):
+            child = parents.id_of(state)
+            if child is None:
+                child = parents.add(state, i, action)
+                if size is None:
+                    depth.append(d + 1)
+                else:
+                    depth[child] = d + 1
+            elif depth[child] <= d + 1:
+                continue
+            else:
+                parents.update(child, i, action)
+                depth[child] = d + 1
+            stack.append((child, d + 1))
+        if stats is not None:
+            record_frontier(stats, len(stack))
+            stats["visited"] = max(stats["visited"], len(parents))
+
+    cut_off = any(
+        depth[i] == limit and any(
+            state not in parents for _, state in neighbors(parents.states[i])
+        )
+        for i in at_limit
+    )
+    return None, cut_off
+
+
+def uniform_cost(start, goal, neighbors, cost=unit_cost, stats=None,
+                 size=None):
+    """
+    Finds a cheapest path, where cost(state, action, next_state) gives the
+    positive cost of each step.
+    """
+    return best_first(start, goal, neighbors, cost,
+                      lambda g, state: g, stats, size)
+
+
+def greedy_best_first(start, goal, neighbors, heuristic, stats=None,
+                      size=None):
+    """
+    Finds a path by always expanding the state that heuristic(state)
+    estimates to be closest to the goal. The path need not be the
+    shortest.
+    """
+    return best_first(start, goal, neighbors, unit_cost,
+                      lambda g, state: heuristic(state), stats, size)
+
+
+def a_star(start, goal, neighbors, heuristic, cost=unit_cost, stats=None,
+           size=None):
+    """
+    Finds a cheapest path by expanding states in order of cost so far plus
+    heuristic(state). The heuristic must never overestimate the remaining
+    cost, nor drop by more than the cost of a step, for the path to be
+    the cheapest.
+    """
+    return best_first(start, goal, neighbors, cost,
+                      lambda g, state: g + heuristic(state), stats, size)
+
+
+def best_first(start, goal, neighbors, cost, priority, stats=None,
+               size=None):
+    """
+    Graph search that always expands the reached state with the lowest
+    priority(cost so far, state), ties going to the state queued first.
+    States are checked against the goal as they are expanded, so a
+    cheaper path found later is not missed.
+
+    The heap holds (priority, order, id) entries. A state queued again
+    with a lower priority leaves its old entry behind, which is skipped
+    when it comes out. If `stats` is a dict, the counters from new_stats
+    are stored in it.
+    """
+    is_goal = goal_test(goal)
+    if stats is not None:
+        stats.update(new_stats())
+
+    parents = new_parents(start, size, costs=True)
+    root = parents.id_of(start)
+    queued = array("d", [0]) * (size or 1)
+    queued[root] = priority(0, start)
+    closed = bytearray(size or 1)
+    order = count()
+    heap = [(queued[root], next(order), root)]
+    while heap:
+        p, _, i = heapq.heappop(heap)
+        if closed[i] or p != queued[i]:
+            continue
+        if is_goal(parents.states[i]):
+            return parents.path(i)
+        closed[i] = 1
+        if stats is not None:
+            stats["expanded"] += 1
+        for action, state in neighbors(parents.states[i]):
+            g = parents.costs[i] + cost(parents.states[i], action, state)
+            child_priority = priority(g, state)
+            child = parents.id_of(state)
+            if child is None:
+                child = parents.add(state, i, action, g)
+                if size is None:
+                    queued.append(child_priority)
+                    closed.append(0)
+                else:
+                    queued[child] = child_priority
+            elif closed[child] or queued[child] <= child_priority:
+                continue
+            else:
+                parents.update(child, i, action, g)
+                queued[child] = child_priority
+            heapq.heappush(heap, (child_priority, next(order), child))
+        if stats is not None:
+            stats["visited"] = len(parents)
+            record_frontier(stats, len(heap))
+    return None
+
+
+# Searches by name, for picking one from the command line
+ALGORITHMS = {
+    "bfs": breadth_first,
+    "dfs": depth_first,
+    "ids": iterative_deepening,
+    "ucs": uniform_cost,
+    "greedy": greedy_best_first,
+    "astar": a_star,
+}
+
+# Searches that also need a heuristic(state) function
+INFORMED = {"greedy", "astar"}
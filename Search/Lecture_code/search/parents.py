@@ -0,0 +1,157 @@
+from array import array
+
+# Parent of the start state, and of states not reached yet in DenseParents
+START = -1
+UNREACHED = -2
+
+
+class Node():
+    """
+    A state reached by a search, with the node it was reached from, the
+    action taken, the total path cost and the number of steps so far.
+    """
+
+    __slots__ = ("state", "parent", "action", "cost", "depth")
+
+    def __init__(self, state, parent=None, action=None, cost=0):
+        self.state = state
+        self.parent = parent
+        self.action = action
+        self.cost = cost
+        self.depth = 0 if parent is None else parent.depth + 1
+
+    def path(self):
+        """
+        Returns the list of (action, state) pairs that lead from the start
+        to this node, not including the start itself.
+        """
+        path = []
+        node = self
+        while node.parent is not None:
+            path.append((node.action, node.state))
+            node = node.parent
+        path.reverse()
+        return path
+
+
+class ParentArrays():
+    """
+    The parent pointers of a search, kept in flat arrays instead of one
+    Node per state.
+
+    Each state reached is interned to a small int id, its position in
+    `states`. parents[id] is the id of the state it was reached from
+    (START for the start) and actions[id] the id of the action taken,
+    itself interned in `action_list`. With `costs`, costs[id] is the
+    cost of the path to the state. Nodes are only created when a path is
+    rebuilt.
+
+    The degrees project keeps a cut-down copy in its util.py, as it must
+    run on its own. Fix a bug in either one in both.
+    """
+
+    def __init__(self, start, costs=False):
+        self.ids = {start: 0}
+        self.states = [start]
+        self.parents = array("i", [START])
+        self.actions = array("i", [-1])
+        self.action_ids = {}
+        self.action_list = []
+        self.costs = array("d", [0]) if costs else None
+
+    def __len__(self):
+        return len(self.states)
+
+    def __contains__(self, state):
+        return state in self.ids
+
+    def id_of(self, state):
+        """Returns the id of a state, or None if it was never reached."""
+        return self.ids.get(state)
+
+    def action_id(self, action):
+        """Interns an action, returning its id."""
+        i = self.action_ids.get(action)
+        if i is None:
+            i = self.action_ids[action] = len(self.action_list)
+            self.action_list.append(action)
+        return i
+
+    def add(self, state, parent, action, cost=0):
+        """Interns a newly reached state, returning its id."""
+        i = len(self.states)
+        self.ids[state] = i
+        self.states.append(state)
+        self.parents.append(parent)
+        self.actions.append(self.action_id(action))
+        if self.costs is not None:
+            self.costs.append(cost)
+        return i
+
+    def update(self, i, parent, action, cost=0):
+        """Records a better way to reach the state with id i."""
+        self.parents[i] = parent
+        self.actions[i] = self.action_id(action)
+        if self.costs is not None:
+            self.costs[i] = cost
+
+    def node(self, i):
+        """Rebuilds the chain of Nodes from the start to the state i."""
+        chain = []
+        while i != START:
+            chain.append(i)
+            i = self.parents[i]
+        node = None
+        for i in reversed(chain):
+            a = self.actions[i]
+            action = self.action_list[a] if a >= 0 else None
+            cost = 0 if self.costs is None else self.costs[i]
+            node = Node(self.states[i], node, action, cost)
+        return node
+
+    def path(self, i):
+        """Returns the (action, state) pairs from the start to state i."""
+        return self.node(i).path()
+
+
+class DenseParents(ParentArrays):
+    """
+    ParentArrays for searches whose states are the ints 0 to size - 1,
+    which serve as their own ids. The arrays are allocated for every
+    state up front, but no dict or list of states is needed, so a search
+    that reaches a large share of the states uses far less memory.
+    """
+
+    def __init__(self, start, size, costs=False):
+        self.states = range(size)
+        self.parents = array("i", [UNREACHED]) * size
+        self.parents[start] = START
+        self.actions = array("i", [-1]) * size
+        self.action_ids = {}
+        self.action_list = []
+        self.costs = array("d", [0]) * size if costs else None
+        self.reached = 1
+
+    def __len__(self):
+        return self.reached
+
+    def __contains__(self, state):
+        return self.parents[state] != UNREACHED
+
+    def id_of(self, state):
+        return state if self.parents[state] != UNREACHED else None
+
+    def add(self, state, parent, action, cost=0):
+        self.reached += 1
+        self.update(state, parent, action, cost)
+        return state
+
+
+def new_parents(start, size=None, costs=False):
+    """
+    Returns the parent arrays for a search from `start`, dense if the
+    states are known to be the ints 0 to size - 1.
+    """
+    if size is None:
+        return ParentArrays(start, costs)
+    return DenseParents(start, size, costs)
@@ -0,0 +1,12 @@
+def new_stats(start=1):
+    """
+    Returns fresh counters for a search: the states it expanded, the most
+    it held in its frontier at once and the states it reached.
+    """
+    return {"expanded": 0, "frontier peak": start, "visited": start}
+
+
+def record_frontier(stats, size):
+    """Raises the frontier peak in `stats` to `size` if it is larger."""
+    if size > stats["frontier peak"]:
+        stats["frontier peak"] = size
@@ -0,0 +1,113 @@
+class ShortestPaths():
+    """
+    Every shortest path between two people, kept as a layered graph.
+
+    A breadth-first search from the source numbers people by depth until
+    it reaches the target. Walking back from the target through co-stars
+    one layer closer to the source then finds exactly the people on some
+    shortest path. Paths that differ only in the movie linking two people
+    are counted separately, as they are different chains of movies.
+    Counting uses dynamic programming over the layers, and paths are
+    generated one at a time, so neither needs the whole set in memory.
+
+    Only paths of the shortest length are kept: this does not go on to
+    longer paths as a k shortest paths (Yen) enumeration would.
+    """
+
+    def __init__(self, graph, people, source, target):
+        self.graph = graph
+        self.people = people
+        self.source = graph.index_of(source)
+        self.target = graph.index_of(target)
+
+        # predecessors[i] lists (person index, movie ids) pairs one layer
+        # closer to the source for each person i on a shortest path
+        self.predecessors = {}
+        self.depth = {}
+        self.length = None
+        depth = self.layers()
+        if depth is not None:
+            self.length = depth[self.target]
+            self.link(depth)
+
+    def layers(self):
+        """
+        Returns the depth of everyone the search from the source reached
+        up to the target, or None if the target cannot be reached.
+        """
+        if self.source is None or self.target is None:
+            return None
+        if not self.graph.connected(self.graph.person_ids[self.source],
+                                    self.graph.person_ids[self.target]):
+            return None
+
+        depth = {self.source: 0}
+        layer = [self.source]
+        while layer and self.target not in depth:
+            next_layer = []
+            for i in layer:
+                for _, neighbor in self.graph.neighbors_of(i):
+                    if neighbor not in depth:
+                        depth[neighbor] = depth[i] + 1
+                        next_layer.append(neighbor)
+            layer = next_layer
+        return depth if self.target in depth else None
+
+    def link(self, depth):
+        """Finds the predecessors of everyone on a shortest path."""
+        self.predecessors[self.target] = []
+        self.depth[self.target] = depth[self.target]
+        layer = [self.target]
+        while layer:
+            next_layer = []
+            for i in layer:
+                for _, neighbor in self.graph.neighbors_of(i):
+                    if depth.get(neighbor) != depth[i] - 1:
+                        continue
+                    self.predecessors[i].append(
+                        (neighbor, self.movies_between(neighbor, i))
+                    )
+                    if neighbor not in self.predecessors:
+                        self.predecessors[neighbor] = []
+                        self.depth[neighbor] = depth[neighbor]
+                        next_layer.append(neighbor)
+            layer = next_layer
+
+    def movies_between(self, i, j):
+        """Returns the sorted ids of the movies two people starred in."""
+        movies_i = self.people[self.graph.person_ids[i]]["movies"]
+        movies_j = self.people[self.graph.person_ids[j]]["movies"]
+        return sorted(movies_i & movies_j)
+
+    def count(self):
+        """Returns how many shortest paths there are."""
+        if self.length is None:
+            return 0
+
+        # Count paths from the source to each person, a layer at a time
+        counts = {self.source: 1}
+        for i in sorted(self.depth, key=self.depth.get):
+            if i != self.source:
+                counts[i] = sum(counts[j] * len(movies)
+                                for j, movies in self.predecessors[i])
+        return counts[self.target]
+
+    def __iter__(self):
+        """
+        Yields every shortest list of (movie_id, person_id) pairs that
+        connect the source to the target, one at a time.
+        """
+        if self.length is None:
+            return
+        yield from self.paths_to(self.target)
+
+    def paths_to(self, i):
+        """Yields the shortest paths from the source to person i."""
+        if i == self.source:
+            yield []
+            return
+        person_id = self.graph.person_ids[i]
+        for j, movies in self.predecessors[i]:
+            for path in self.paths_to(j):
+                for movie_id in movies:
+                    yield path + [(movie_id, person_id)]
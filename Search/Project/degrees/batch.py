@@ -0,0 +1,92 @@
+import argparse
+import multiprocessing
+import os
+import random
+import time
+from collections import Counter
+
+import degrees
+
+# Search function used by this process when it is a pool worker
+worker_search = None
+
+
+def initialize_worker(directory, search):
+    """
+    Maps the snapshot into a worker process. Every worker maps the same
+    read-only file, so the graph lives once in the page cache instead of
+    being pickled to each process.
+    """
+    global worker_search
+    degrees.load_data(directory, cache=True)
+    worker_search = degrees.SEARCHES[search]
+
+
+def solve(pair):
+    """Answers one (source, target) query inside a worker."""
+    source, target = pair
+    return source, target, worker_search(source, target)
+
+
+def separations(directory, pairs, processes=None, search="bidirectional",
+                chunksize=64):
+    """
+    Yields (source, target, path) for every (source, target) pair of
+    person ids, in order, spreading the searches over a process pool.
+    """
+    # Make sure a fresh snapshot exists before any worker maps it
+    degrees.load_data(directory, cache=True)
+
+    with multiprocessing.Pool(
+        processes, initializer=initialize_worker,
+        initargs=(directory, search)
+    ) as pool:
+        yield from pool.imap(solve, pairs, chunksize)
+
+
+def degree_distribution(directory, source, targets=None, **kwargs):
+    """
+    Returns a Counter mapping degrees of separation from `source` (None
+    for not connected) to how many of the `targets` are that far away.
+    Targets default to everyone else.
+    """
+    if targets is None:
+        degrees.load_data(directory, cache=True)
+        targets = [person_id for person_id in degrees.people
+                   if person_id != source]
+    pairs = ((source, target) for target in targets)
+    return Counter(
+        None if path is None else len(path)
+        for _, _, path in separations(directory, pairs, **kwargs)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time batch separation queries across process counts."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--pairs", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--search", choices=sorted(degrees.SEARCHES),
+                        default="bidirectional")
+    parser.add_argument("--processes", type=int, nargs="+",
+                        default=[1, 2, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    degrees.load_data(args.directory, cache=True)
+    rng = random.Random(args.seed)
+    person_ids = list(degrees.people)
+    pairs = [tuple(rng.sample(person_ids, 2)) for _ in range(args.pairs)]
+
+    print(f"{'processes':>10}{'seconds':>12}{'queries/s':>12}")
+    for processes in args.processes:
+        start = time.perf_counter()
+        for _ in separations(args.directory, pairs, processes, args.search):
+            pass
+        seconds = time.perf_counter() - start
+        print(f"{processes:>10}{seconds:>12.3f}{len(pairs) / seconds:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+import argparse
+import json
+import platform
+import random
+import time
+import tracemalloc
+
+import degrees
+import util
+from graph import AdjacencyIndex
+from nameindex import NameIndex
+
+
+def run_search(search):
+    """Wraps a search function as a runner returning (path, stats)."""
+    def runner(source, target):
+        stats = {}
+        path = search(source, target, stats)
+        return path, stats
+    return runner
+
+
+RUNNERS = {
+    "bfs": run_search(degrees.shortest_path),
+    "bidirectional": run_search(degrees.shortest_path_bidirectional),
+}
+
+# Counters summed over all pairs, as set by the searches in their stats
+COUNTERS = ("expanded", "frontier peak", "visited")
+
+
+def random_pairs(seed, count):
+    """Returns `count` seeded random pairs of loaded person ids."""
+    rng = random.Random(seed)
+    person_ids = sorted(degrees.people)
+    return [tuple(rng.sample(person_ids, 2)) for _ in range(count)]
+
+
+def search_main(args):
+    print("Loading data...")
+    degrees.load_data(args.directory)
+    print("Data loaded.")
+
+    runners = dict(RUNNERS)
+    if args.index:
+        start = time.perf_counter()
+        index = AdjacencyIndex.build(degrees.people, degrees.movies)
+        print(f"Index built in {time.perf_counter() - start:.2f}s.")
+        runners["index bfs"] = run_search(index.shortest_path)
+        runners["index bidir"] = run_search(
+            index.shortest_path_bidirectional
+        )
+
+    totals = {name: {"expanded": 0, "seconds": 0.0} for name in runners}
+    for source, target in random_pairs(args.seed, args.pairs):
+        lengths = {}
+        for name, runner in runners.items():
+            start = time.perf_counter()
+            path, stats = runner(source, target)
+            totals[name]["seconds"] += time.perf_counter() - start
+            totals[name]["expanded"] += stats["expanded"]
+            lengths[name] = None if path is None else len(path)
+        print(f"{source} -> {target}: {lengths}")
+
+    print(f"{'search':<15}{'expanded':>12}{'seconds':>12}")
+    for name, total in totals.items():
+        print(f"{name:<15}{total['expanded']:>12}{total['seconds']:>12.4f}")
+
+
+def report_directory(directory, args):
+    """
+    Loads one directory and runs every chosen search on the same seeded
+    pairs, returning the load time and per pair and total counters.
+    """
+    start = time.perf_counter()
+    degrees.load_data(directory, index=args.index, compact=args.compact)
+    result = {
+        "load seconds": time.perf_counter() - start,
+        "people": len(degrees.people),
+        "movies": len(degrees.movies),
+        "searches": {},
+    }
+    if "weighted" in args.searches:
+        start = time.perf_counter()
+        degrees.load_weights()
+        result["weights seconds"] = time.perf_counter() - start
+    pairs = random_pairs(args.seed, args.pairs)
+    for name in args.searches:
+        search = degrees.SEARCHES[name]
+        total = dict.fromkeys(COUNTERS, 0)
+        total["seconds"] = 0.0
+        runs = []
+        for source, target in pairs:
+            stats = {}
+            start = time.perf_counter()
+            path = search(source, target, stats)
+            seconds = time.perf_counter() - start
+            runs.append(dict(stats, source=source, target=target,
+                             degrees=None if path is None else len(path),
+                             seconds=seconds))
+            for counter in COUNTERS:
+                total[counter] += stats[counter]
+            total["seconds"] += seconds
+        result["searches"][name] = {"total": total, "pairs": runs}
+    return result
+
+
+def report_main(args):
+    report = {
+        "python": platform.python_version(),
+        "seed": args.seed,
+        "pairs": args.pairs,
+        "index": args.index,
+        "compact": args.compact,
+        "directories": {},
+    }
+    width = max(len(directory) for directory in args.directories + ["dir"])
+    print(f"{'dir':<{width}}  {'search':<15}{'expanded':>10}{'peak':>10}"
+          f"{'visited':>10}{'load s':>9}{'search s':>10}")
+    for directory in args.directories:
+        result = report_directory(directory, args)
+        report["directories"][directory] = result
+        for name, search in result["searches"].items():
+            total = search["total"]
+            print(f"{directory:<{width}}  {name:<15}{total['expanded']:>10}"
+                  f"{total['frontier peak']:>10}{total['visited']:>10}"
+                  f"{result['load seconds']:>9.2f}{total['seconds']:>10.4f}")
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}.")
+
+
+# Searches compared by the memory command: the Node per state original
+# and the parent array version of the same breadth-first search
+MEMORY_SEARCHES = {
+    "nodes": degrees.shortest_path,
+    "parent arrays": degrees.shortest_path_interned,
+}
+
+
+def memory_main(args):
+    print("Loading data...")
+    degrees.load_data(args.directory)
+    print("Data loaded.")
+
+    # Peaks are summed over the pairs, so bytes per state are weighted
+    # towards the larger searches rather than the fixed cost of each
+    pairs = random_pairs(args.seed, args.pairs)
+    print(f"{'search':<15}{'expanded':>10}{'peak MB':>10}{'bytes/state':>13}")
+    for name, search in MEMORY_SEARCHES.items():
+        expanded = 0
+        peaks = 0
+        for source, target in pairs:
+            stats = {}
+            tracemalloc.start()
+            search(source, target, stats)
+            peaks += tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            expanded += stats["expanded"]
+        print(f"{name:<15}{expanded:>10}{peaks / 1e6:>10.1f}"
+              f"{peaks / max(expanded, 1):>13.0f}")
+
+
+class ListStackFrontier():
+    """The list-scanning frontier from the lecture code, for comparison."""
+
+    def __init__(self):
+        self.frontier = []
+
+    def add(self, node):
+        self.frontier.append(node)
+
+    def contains_state(self, state):
+        return any(node.state == state for node in self.frontier)
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        return self.frontier.pop()
+
+
+class ListQueueFrontier(ListStackFrontier):
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        return self.frontier.pop(0)
+
+
+FRONTIERS = {
+    "list stack": ListStackFrontier,
+    "list queue": ListQueueFrontier,
+    "util stack": util.StackFrontier,
+    "util queue": util.QueueFrontier,
+}
+
+
+def time_frontier(frontier_class, size, operations, rng):
+    """
+    Fills a frontier with `size` nodes, then times `operations` rounds of
+    contains_state, add and remove against it.
+    Returns seconds per round.
+    """
+    frontier = frontier_class()
+    for i in range(size):
+        frontier.add(util.Node(state=i, parent=None))
+    probes = [rng.randrange(2 * size) for _ in range(operations)]
+
+    start = time.perf_counter()
+    for i, state in enumerate(probes):
+        frontier.contains_state(state)
+        frontier.add(util.Node(state=size + i, parent=None))
+        frontier.remove()
+    return (time.perf_counter() - start) / operations
+
+
+def frontier_main(args):
+    rng = random.Random(args.seed)
+    print(f"{'frontier':<15}{'size':>10}{'us/round':>12}")
+    for size in args.sizes:
+        for name, frontier_class in FRONTIERS.items():
+            seconds = time_frontier(frontier_class, size, args.operations, rng)
+            print(f"{name:<15}{size:>10}{seconds * 1e6:>12.2f}")
+
+
+# Load modes compared by the load command, as load_data keyword arguments
+LOAD_MODES = {
+    "dicts": {},
+    "compact": {"compact": True},
+}
+
+
+def load_main(args):
+    print(f"{'mode':<10}{'seconds':>10}{'final MB':>10}{'peak MB':>10}")
+    for name, options in LOAD_MODES.items():
+        start = time.perf_counter()
+        degrees.load_data(args.directory, **options)
+        seconds = time.perf_counter() - start
+
+        # Load again to measure memory, tracemalloc is too slow to time
+        tracemalloc.start()
+        degrees.load_data(args.directory, **options)
+        final, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{name:<10}{seconds:>10.2f}{final / 1e6:>10.1f}"
+              f"{peak / 1e6:>10.1f}")
+
+
+def random_name(rng):
+    """Returns a made up "first last" name of random syllables."""
+    def word():
+        return "".join(rng.choice("bcdfghjklmnprstvwz") + rng.choice("aeiou")
+                       for _ in range(rng.randint(2, 4)))
+    return f"{word()} {word()}"
+
+
+def misspell(name, rng):
+    """Returns name with one character replaced, dropped or doubled."""
+    i = rng.randrange(len(name))
+    edit = rng.randrange(3)
+    if edit == 0:
+        return name[:i] + rng.choice("abcdefghijklmnopqrstuvwxyz") \
+            + name[i + 1:]
+    if edit == 1:
+        return name[:i] + name[i + 1:]
+    return name[:i] + name[i] + name[i:]
+
+
+def names_main(args):
+    rng = random.Random(args.seed)
+    names = set()
+    while len(names) < args.names:
+        names.add(random_name(rng))
+    start = time.perf_counter()
+    index = NameIndex(names)
+    print(f"Indexed {len(names)} names in "
+          f"{time.perf_counter() - start:.1f}s.")
+
+    keys = rng.sample(index.keys, args.queries)
+    queries = [misspell(key, rng) for key in keys]
+    print(f"{'lookup':<10}{'ms/query':>10}{'found':>8}")
+    for name, lookup in (("complete", index.complete),
+                         ("fuzzy", index.fuzzy),
+                         ("suggest", index.suggest)):
+        found = 0
+        start = time.perf_counter()
+        for key, query in zip(keys, queries):
+            found += key in lookup(query)
+        seconds = time.perf_counter() - start
+        print(f"{name:<10}{seconds / len(queries) * 1e3:>10.2f}"
+              f"{found / len(queries):>8.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for degrees.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    search = commands.add_parser(
+        "search", help="compare the search algorithms on random pairs"
+    )
+    search.add_argument("directory", nargs="?", default="large")
+    search.add_argument("--pairs", type=int, default=20)
+    search.add_argument("--seed", type=int, default=0)
+    search.add_argument("--index", action="store_true",
+                        help="also time the adjacency index searches")
+    search.set_defaults(run=search_main)
+
+    report = commands.add_parser(
+        "report", help="write search counters and timings as JSON"
+    )
+    report.add_argument("directories", nargs="*", default=["small", "large"])
+    report.add_argument("--pairs", type=int, default=20)
+    report.add_argument("--seed", type=int, default=0)
+    report.add_argument("--searches", nargs="+",
+                        choices=sorted(degrees.SEARCHES),
+                        default=["bfs", "bidirectional"])
+    report.add_argument("--index", action="store_true",
+                        help="search with the adjacency index")
+    report.add_argument("--compact", action="store_true",
+                        help="load the tables as compact columns")
+    report.add_argument("--output", default="benchmark.json",
+                        help="file the JSON results are written to")
+    report.set_defaults(run=report_main)
+
+    frontier = commands.add_parser(
+        "frontier", help="time frontier operations at large queue sizes"
+    )
+    frontier.add_argument("--sizes", type=int, nargs="+",
+                          default=[10 ** 5, 10 ** 6])
+    frontier.add_argument("--operations", type=int, default=200)
+    frontier.add_argument("--seed", type=int, default=0)
+    frontier.set_defaults(run=frontier_main)
+
+    memory = commands.add_parser(
+        "memory", help="compare bytes per expanded state of node and "
+                       "parent array searches"
+    )
+    memory.add_argument("directory", nargs="?", default="large")
+    memory.add_argument("--pairs", type=int, default=20)
+    memory.add_argument("--seed", type=int, default=0)
+    memory.set_defaults(run=memory_main)
+
+    load = commands.add_parser(
+        "load", help="compare load time and memory of the load modes"
+    )
+    load.add_argument("directory", nargs="?", default="large")
+    load.set_defaults(run=load_main)
+
+    names = commands.add_parser(
+        "names", help="time prefix and fuzzy lookups of misspelt names "
+                      "in a large made up name index"
+    )
+    names.add_argument("--names", type=int, default=10 ** 6)
+    names.add_argument("--queries", type=int, default=200)
+    names.add_argument("--seed", type=int, default=0)
+    names.set_defaults(run=names_main)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import threading
+from collections import Counter, OrderedDict
+
+
+def reverse_path(source, path):
+    """
+    Turns a path from the source to its last person into the same chain
+    of movies walked from that person back to the source.
+    """
+    people = [source] + [person_id for _, person_id in path]
+    return [(path[k][0], people[k]) for k in range(len(path) - 1, -1, -1)]
+
+
+class PathCache():
+    """
+    Answers shortest path queries from recent results where it can.
+
+    Results are kept per (source, target) pair, and a query for the
+    reverse pair is answered by walking a cached path backwards. Once a
+    person has been the source or target of `tree_after` queries, a full
+    search tree is built from them, and every later query touching that
+    person is answered from it. Both caches evict their least recently
+    used entries when full.
+
+    One cache can be shared by the threads of a server: the caches and
+    counters are only touched while holding a lock, which is released
+    while searching or building a tree.
+    """
+
+    def __init__(self, search, build_tree, max_paths=10000, max_trees=8,
+                 tree_after=2):
+        self.search = search
+        self.build_tree = build_tree
+        self.max_paths = max_paths
+        self.max_trees = max_trees
+        self.tree_after = tree_after
+        self.paths = OrderedDict()
+        self.trees = OrderedDict()
+        self.seen = OrderedDict()
+        self.counters = Counter()
+        self.lock = threading.Lock()
+
+    def clear(self):
+        """Forgets every cached path and tree, after loading new data."""
+        with self.lock:
+            self.paths.clear()
+            self.trees.clear()
+            self.seen.clear()
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, from the caches if
+        possible.
+
+        If no possible path, returns None.
+        """
+        with self.lock:
+            for key, reverse in (((source, target), False),
+                                 ((target, source), True)):
+                if key in self.paths:
+                    self.paths.move_to_end(key)
+                    self.counters["path hits"] += 1
+                    path = self.paths[key]
+                    if reverse and path is not None:
+                        path = reverse_path(target, path)
+                    return path
+
+        found, path = self.from_trees(source, target)
+        if not found:
+            path = self.search(source, target)
+        self.remember((source, target), path)
+        return path
+
+    def from_trees(self, source, target):
+        """
+        Answers from a retained tree of either person, returning (True,
+        path), or (False, None) if no tree covers them. A query answered
+        from a tree built for it counts as a miss, not a tree hit.
+        """
+        for root, other, reverse in ((source, target, False),
+                                     (target, source, True)):
+            tree, built = self.tree_for(root)
+            if tree is not None:
+                with self.lock:
+                    self.counters["misses" if built else "tree hits"] += 1
+                path = tree.path_to(other)
+                if reverse and path is not None:
+                    path = reverse_path(target, path)
+                return True, path
+        with self.lock:
+            self.counters["misses"] += 1
+        return False, None
+
+    def tree_for(self, person_id):
+        """
+        Returns the retained tree rooted at a person, building it once the
+        person has been seen often enough, or None, along with whether
+        the tree was just built.
+        """
+        with self.lock:
+            if person_id in self.trees:
+                self.trees.move_to_end(person_id)
+                return self.trees[person_id], False
+
+            count = self.seen.pop(person_id, 0) + 1
+            if count < self.tree_after or self.max_trees < 1:
+                self.seen[person_id] = count
+                while len(self.seen) > self.max_paths:
+                    self.seen.popitem(last=False)
+                return None, False
+
+        tree = self.build_tree(person_id)
+        if tree is None:
+            return None, False
+        with self.lock:
+            self.counters["trees built"] += 1
+            self.trees[person_id] = tree
+            while len(self.trees) > self.max_trees:
+                self.trees.popitem(last=False)
+        return tree, True
+
+    def remember(self, key, path):
+        """Caches a result, evicting the least recently used if full."""
+        if self.max_paths < 1:
+            return
+        with self.lock:
+            self.paths[key] = path
+            while len(self.paths) > self.max_paths:
+                self.paths.popitem(last=False)
+
+    def stats(self):
+        """Returns hit, miss and size counters for the caches."""
+        with self.lock:
+            stats = {
+                "path hits": self.counters["path hits"],
+                "tree hits": self.counters["tree hits"],
+                "misses": self.counters["misses"],
+                "trees built": self.counters["trees built"],
+                "paths cached": len(self.paths),
+                "trees cached": len(self.trees),
+            }
+        queries = stats["path hits"] + stats["tree hits"] + stats["misses"]
+        stats["hit rate"] = (
+            (stats["path hits"] + stats["tree hits"]) / queries
+            if queries else 0.0
+        )
+        return stats
@@ -0,0 +1,363 @@
+import csv
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from collections.abc import Mapping
+from itertools import islice
+from operator import itemgetter
+
+# Rows parsed at a time while streaming the CSV files
+CHUNK_SIZE = 65536
+
+
+def find(column, key):
+    """Returns the position of `key` in a sorted column, or None."""
+    i = bisect_left(column, key)
+    if i < len(column) and column[i] == key:
+        return i
+    return None
+
+
+# Years that fit the int16 ("h") year columns
+YEARS = range(-2 ** 15, 2 ** 15)
+
+
+def year(value):
+    """
+    Converts a CSV year to an int, with 0 standing for unknown. Raises
+    ValueError if it is not a number or does not fit a year column.
+    """
+    number = int(value) if value else 0
+    if number not in YEARS:
+        raise ValueError(f"year {value} out of range")
+    return number
+
+
+def year_or_unknown(value):
+    """Converts a CSV year to an int, with 0 for unknown or bad years."""
+    try:
+        return year(value)
+    except ValueError:
+        return 0
+
+
+class CompactData():
+    """
+    The people, movies and names tables stored column by column.
+
+    Person and movie ids are interned to dense integers, their position in
+    the sorted id columns. Names, births, titles and years are parallel
+    columns indexed by those integers, with 0 for an unknown birth or
+    year. The movies of person i are
+    person_movies[person_movies_offsets[i]:person_movies_offsets[i + 1]],
+    and the stars of a movie are stored the same way, both as sorted
+    integer arrays. Every person's lowercase name is a row of the sorted
+    name_keys column, next to their integer id in name_people.
+
+    `skipped` counts the CSV rows left out while loading, by reason.
+    """
+
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_movies_offsets, person_movies,
+                 movie_stars_offsets, movie_stars,
+                 name_keys, name_people, skipped=None):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        self.person_movies_offsets = person_movies_offsets
+        self.person_movies = person_movies
+        self.movie_stars_offsets = movie_stars_offsets
+        self.movie_stars = movie_stars
+        self.name_keys = name_keys
+        self.name_people = name_people
+        self.skipped = Counter() if skipped is None else skipped
+
+    @classmethod
+    def from_csv(cls, directory):
+        """
+        Streams the CSV files in `directory` into columns, a chunk of
+        rows at a time. Rows that cannot be used are counted, by reason,
+        in the `skipped` Counter of the result.
+        """
+        skipped = Counter()
+        person_ids, person_names, person_births = read_table(
+            f"{directory}/people.csv", ("id", "name", "birth"), skipped
+        )
+        movie_ids, movie_titles, movie_years = read_table(
+            f"{directory}/movies.csv", ("id", "title", "year"), skipped
+        )
+
+        # Intern the star pairs as they stream past, by binary search on
+        # the sorted id columns rather than through a lookup dict
+        star_people = array("i")
+        star_movies = array("i")
+        for rows in read_chunks(
+            f"{directory}/stars.csv", ("person_id", "movie_id"), skipped
+        ):
+            for person_id, movie_id in rows:
+                i = find(person_ids, person_id)
+                j = find(movie_ids, movie_id)
+                if i is None:
+                    skipped["stars.csv: unknown person"] += 1
+                elif j is None:
+                    skipped["stars.csv: unknown movie"] += 1
+                else:
+                    star_people.append(i)
+                    star_movies.append(j)
+
+        return cls.from_columns(
+            person_ids, person_names, person_births,
+            movie_ids, movie_titles, movie_years,
+            star_people, star_movies, skipped=skipped
+        )
+
+    @classmethod
+    def from_tables(cls, names, people, movies):
+        """Converts the dict-of-dicts tables into columns."""
+        person_ids = sorted(people)
+        movie_ids = sorted(movies)
+        person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        movie_index = {movie_id: j for j, movie_id in enumerate(movie_ids)}
+        star_people = array("i")
+        star_movies = array("i")
+        for i, person_id in enumerate(person_ids):
+            for movie_id in people[person_id]["movies"]:
+                if movie_id in movie_index:
+                    star_people.append(i)
+                    star_movies.append(movie_index[movie_id])
+        return cls.from_columns(
+            person_ids,
+            [people[person_id]["name"] for person_id in person_ids],
+            array("h", [year_or_unknown(people[p]["birth"])
+                        for p in person_ids]),
+            movie_ids,
+            [movies[movie_id]["title"] for movie_id in movie_ids],
+            array("h", [year_or_unknown(movies[m]["year"])
+                        for m in movie_ids]),
+            star_people, star_movies,
+            names=[(name, person_index[person_id])
+                   for name, ids in names.items() for person_id in ids]
+        )
+
+    @classmethod
+    def from_columns(cls, person_ids, person_names, person_births,
+                     movie_ids, movie_titles, movie_years,
+                     star_people, star_movies, names=None, skipped=None):
+        """
+        Builds the membership arrays from parallel arrays of the person
+        and movie index of each star pair. The name index is derived from
+        person_names unless (lowercase name, person index) pairs are given.
+        """
+        skipped = Counter() if skipped is None else skipped
+        person_movies_offsets, person_movies, duplicates = group(
+            len(person_ids), star_people, star_movies
+        )
+        movie_stars_offsets, movie_stars, _ = group(
+            len(movie_ids), star_movies, star_people
+        )
+        if duplicates:
+            skipped["stars.csv: duplicate"] += duplicates
+
+        if names is None:
+            lowered = [name.lower() for name in person_names]
+            order = sorted(range(len(lowered)), key=lowered.__getitem__)
+            name_keys = [lowered[i] for i in order]
+            name_people = array("i", order)
+        else:
+            names = sorted(names)
+            name_keys = [name for name, _ in names]
+            name_people = array("i", [i for _, i in names])
+
+        return cls(
+            person_ids, person_names, person_births,
+            movie_ids, movie_titles, movie_years,
+            person_movies_offsets, person_movies,
+            movie_stars_offsets, movie_stars,
+            name_keys, name_people, skipped
+        )
+
+    def person_index(self, person_id):
+        """Returns the integer id of a person id, or None if unknown."""
+        return find(self.person_ids, person_id)
+
+    def movie_index(self, movie_id):
+        """Returns the integer id of a movie id, or None if unknown."""
+        return find(self.movie_ids, movie_id)
+
+    def movies_of(self, i):
+        """Returns the sorted integer ids of the movies of person i."""
+        offsets = self.person_movies_offsets
+        return self.person_movies[offsets[i]:offsets[i + 1]]
+
+    def stars_of(self, j):
+        """Returns the sorted integer ids of the stars of movie j."""
+        offsets = self.movie_stars_offsets
+        return self.movie_stars[offsets[j]:offsets[j + 1]]
+
+    def tables(self):
+        """Returns (names, people, movies) views over the columns."""
+        return NamesView(self), PeopleView(self), MoviesView(self)
+
+
+def read_chunks(path, columns, skipped):
+    """
+    Yields lists of (column, ...) tuples for the named `columns` of a CSV
+    file, CHUNK_SIZE rows at a time. Rows with the wrong number of fields
+    are counted in `skipped`.
+    """
+    filename = os.path.basename(path)
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        pick = itemgetter(*[header.index(column) for column in columns])
+        while True:
+            chunk = list(islice(reader, CHUNK_SIZE))
+            if not chunk:
+                return
+            rows = [pick(row) for row in chunk if len(row) == len(header)]
+            if len(rows) < len(chunk):
+                skipped[f"{filename}: malformed"] += len(chunk) - len(rows)
+            yield rows
+
+
+def read_table(path, columns, skipped):
+    """
+    Streams an (id, text, year) CSV file into three columns sorted by id.
+    When an id repeats, its last row wins, as it does in the dict tables.
+    """
+    filename = os.path.basename(path)
+    ids = []
+    texts = []
+    years = array("h")
+    for rows in read_chunks(path, columns, skipped):
+        for row_id, text, value in rows:
+            try:
+                years.append(year(value))
+            except ValueError:
+                skipped[f"{filename}: bad year"] += 1
+                years.append(0)
+            ids.append(row_id)
+            texts.append(text)
+
+    # Sorting is stable, so of repeated ids the last one read comes last
+    order = sorted(range(len(ids)), key=ids.__getitem__)
+    kept = [
+        i for n, i in enumerate(order)
+        if n + 1 == len(order) or ids[order[n + 1]] != ids[i]
+    ]
+    if len(kept) < len(order):
+        skipped[f"{filename}: duplicate id"] += len(order) - len(kept)
+    del order
+    return (
+        [ids[i] for i in kept],
+        [texts[i] for i in kept],
+        array("h", [years[i] for i in kept]),
+    )
+
+
+def group(size, rows, members):
+    """
+    Groups parallel arrays of (row, member) pairs into CSR offsets and
+    members arrays with one sorted, duplicate-free row for each of
+    range(size). Returns (offsets, members, duplicates dropped).
+    """
+    offsets = array("q", bytes(8 * (size + 1)))
+    for row in rows:
+        offsets[row + 1] += 1
+    for row in range(size):
+        offsets[row + 1] += offsets[row]
+
+    # Scatter every member into its row, then sort and dedupe each row
+    cursor = array("q", offsets)
+    scattered = array("i", bytes(4 * len(members)))
+    for row, member in zip(rows, members):
+        scattered[cursor[row]] = member
+        cursor[row] += 1
+    del cursor
+
+    grouped = array("i")
+    grouped_offsets = array("q", [0])
+    for row in range(size):
+        grouped.extend(sorted(set(scattered[offsets[row]:offsets[row + 1]])))
+        grouped_offsets.append(len(grouped))
+    return grouped_offsets, grouped, len(members) - len(grouped)
+
+
+class PeopleView(Mapping):
+    """Read-only `people` table over compact columns."""
+
+    def __init__(self, data):
+        self.data = data
+
+    def __getitem__(self, person_id):
+        d = self.data
+        i = d.person_index(person_id)
+        if i is None:
+            raise KeyError(person_id)
+        birth = d.person_births[i]
+        return {
+            "name": d.person_names[i],
+            "birth": str(birth) if birth else "",
+            "movies": {d.movie_ids[j] for j in d.movies_of(i)}
+        }
+
+    def __iter__(self):
+        return iter(self.data.person_ids)
+
+    def __len__(self):
+        return len(self.data.person_ids)
+
+
+class MoviesView(Mapping):
+    """Read-only `movies` table over compact columns."""
+
+    def __init__(self, data):
+        self.data = data
+
+    def __getitem__(self, movie_id):
+        d = self.data
+        j = d.movie_index(movie_id)
+        if j is None:
+            raise KeyError(movie_id)
+        released = d.movie_years[j]
+        return {
+            "title": d.movie_titles[j],
+            "year": str(released) if released else "",
+            "stars": {d.person_ids[i] for i in d.stars_of(j)}
+        }
+
+    def __iter__(self):
+        return iter(self.data.movie_ids)
+
+    def __len__(self):
+        return len(self.data.movie_ids)
+
+
+class NamesView(Mapping):
+    """Read-only `names` table over compact columns."""
+
+    def __init__(self, data):
+        self.data = data
+
+    def __getitem__(self, name):
+        d = self.data
+        start = bisect_left(d.name_keys, name)
+        end = bisect_right(d.name_keys, name, start)
+        if start == end:
+            raise KeyError(name)
+        return {d.person_ids[i] for i in d.name_people[start:end]}
+
+    def __iter__(self):
+        previous = None
+        for name in self.data.name_keys:
+            if name != previous:
+                yield name
+            previous = name
+
+    def __len__(self):
+        return sum(1 for _ in self)
@@ -1,7 +1,17 @@
+import argparse
 import csv
 import sys
-
-from util import Node, StackFrontier, QueueFrontier
+from collections import Counter, deque
+from itertools import islice
+
+import snapshot
+from allpaths import ShortestPaths
+from compact import CompactData, PeopleView
+from graph import AdjacencyIndex, component_labels
+from nameindex import NameIndex
+from weighted import WeightedGraph, recency
+from util import (Node, ParentArrays, StackFrontier, QueueFrontier,
+                  new_stats, record_frontier)
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -12,16 +22,78 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Person to person AdjacencyIndex, built by load_data(index=True)
+graph = None
+
+# Maps person_ids to a label of their connected component, built by
+# load_data when there is no graph to hold the labels
+components = None
+
+# WeightedGraph of movie costs for the weighted search, built by load_weights
+weighted = None
 
+# Counts of the CSV rows the last load_data left out, by reason
+skipped_rows = Counter()
 
+# NameIndex of close matches for unknown names, built by load_data(fuzzy=True)
+name_index = None
 
 
-def load_data(directory):
+
+
+def load_data(directory, index=False, cache=False, compact=False,
+              fuzzy=False):
     """
     Load data from CSV files into memory.
+    With `index`, also build the person to person adjacency index
+    that the searches use instead of walking movies on every hop.
+    With `compact`, keep the tables as integer-interned columns behind
+    read-only views instead of nested dicts.
+    With `cache`, memory-map the compact tables and index from the binary
+    snapshot in the directory, writing a new one first if the CSV files
+    have changed.
+    With `fuzzy`, also build the name index that suggests close matches
+    for names that are not found.
+    Either way, people are labelled with their connected component, so
+    searches between people who are not connected return at once.
+    """
+    global names, people, movies, graph, name_index, skipped_rows, weighted
+    global components
+
+    skipped_rows = Counter()
+    weighted = None
+    loaded = snapshot.load(directory) if cache else None
+    if loaded is not None:
+        data, graph = loaded
+        names, people, movies = data.tables()
+        skipped_rows = data.skipped
+    elif compact or cache:
+        data = CompactData.from_csv(directory)
+        names, people, movies = data.tables()
+        skipped_rows = data.skipped
+        graph = AdjacencyIndex.from_compact(data) if index or cache else None
+        if cache:
+            try:
+                snapshot.save(directory, data, graph)
+            except OSError as e:
+                print(f"Could not write snapshot: {e}")
+    else:
+        load_tables(directory)
+        graph = AdjacencyIndex.build(people, movies) if index else None
+
+    # The index labels components itself, as part of building it
+    components = component_labels(people, movies) if graph is None else None
+    name_index = NameIndex(names) if fuzzy else None
+
+
+def load_tables(directory):
     """
+    Load data from CSV files into the names, people and movies dicts.
+    """
+    global names, people, movies
+    names, people, movies = {}, {}, {}
+
     # Load people
-    
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
@@ -49,22 +121,53 @@ def load_data(directory):
     with open(f"{directory}/stars.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
-            try:
+            if row["person_id"] not in people:
+                skipped_rows["stars.csv: unknown person"] += 1
+            elif row["movie_id"] not in movies:
+                skipped_rows["stars.csv: unknown movie"] += 1
+            else:
                 people[row["person_id"]]["movies"].add(row["movie_id"])
                 movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(
+        description="Find the degrees of separation between two people."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--search", choices=sorted(SEARCHES), default="bfs",
+                        help="search algorithm used to connect the two people")
+    parser.add_argument("--index", action="store_true",
+                        help="precompute the adjacency and component index")
+    parser.add_argument("--cache", action="store_true",
+                        help="load from (and refresh) a binary snapshot")
+    parser.add_argument("--compact", action="store_true",
+                        help="store the tables as integer-interned columns")
+    parser.add_argument("--fuzzy", action="store_true",
+                        help="suggest close matches for names not found")
+    parser.add_argument("--components", type=int, metavar="N",
+                        help="print the N largest component sizes and exit")
+    parser.add_argument("--all", type=int, metavar="K", dest="all_paths",
+                        help="count the paths of the shortest length and "
+                             "print the first K of them (longer paths are "
+                             "never listed)")
+    args = parser.parse_args()
+    directory = args.directory
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    load_data(directory, index=args.index, cache=args.cache,
+              compact=args.compact, fuzzy=args.fuzzy)
     print("Data loaded.")
+    for reason, count in skipped_rows.items():
+        print(f"Skipped {count} rows ({reason}).")
+
+    if args.components is not None:
+        index = adjacency_index()
+        print(f"{len(index.component_sizes)} connected components.")
+        for size in index.largest_components(args.components):
+            print(f"    {size} people")
+        return
 
     naming = input("Name: ");
     source = person_id_for_name(naming)
@@ -76,31 +179,56 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    if args.all_paths is not None:
+        paths = ShortestPaths(adjacency_index(), people, source, target)
+        if paths.length is None:
+            print("Not connected.")
+            return
+        print(f"{paths.count()} shortest paths of "
+              f"{paths.length} degrees of separation.")
+        for number, path in enumerate(islice(paths, args.all_paths), 1):
+            print(f"Path {number}:")
+            print_path(source, path)
+        return
+
+    path = SEARCHES[args.search](source, target)
 
     if path is None:
         print("Not connected.")
     else:
         degrees = len(path)
         print(f"{degrees} degrees of separation.")
-        path = [(None, source)] + path
-        #print(path)
-        for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
-            print(f"{i + 1}: {person1} and {person2} starred in {movie}")
+        print_path(source, path)
+
+
+def print_path(source, path):
+    """Prints each step of a path from the source, one movie per line."""
+    path = [(None, source)] + path
+    #print(path)
+    for i in range(len(path) - 1):
+        person1 = people[path[i][1]]["name"]
+        person2 = people[path[i + 1][1]]["name"]
+        movie = movies[path[i + 1][0]]["title"]
+        print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
         
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, stats=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
-    If no possible path, returns None.
+    If `stats` is a dict, the search counters from util.new_stats are
+    stored in it. If no possible path, returns None.
     """
+    if graph is not None:
+        return graph.shortest_path(source, target, stats)
+    if stats is not None:
+        stats.update(new_stats())
+    if not connected(source, target):
+        return None
+
     #queue
     frontier = QueueFrontier()
 
@@ -155,6 +283,9 @@ def shortest_path(source, target):
             #add to visited
             visited.add(current_node.state)
 
+        if stats is not None:
+            stats["expanded"] += 1
+
         # print("Name: "+ people[current_id]["name"])
         # print("Tuple: ")
 
@@ -193,6 +324,9 @@ def shortest_path(source, target):
                             else:
                                 #print("Added")
                                 frontier.add(node)
+                            if stats is not None:
+                                stats["visited"] += 1
+                                record_frontier(stats, len(frontier))
                             
                     #otherwise node exists
             if finished:
@@ -225,6 +359,130 @@ def shortest_path(source, target):
     # TODO
     #raise NotImplementedError
 
+def shortest_path_interned(source, target, stats=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, by the same breadth-first
+    search as shortest_path but without a Node for every state: people
+    are interned to ids as they are reached, parents are kept in
+    ParentArrays and the frontier holds ids.
+
+    If `stats` is a dict, the search counters from util.new_stats are
+    stored in it. If no possible path, returns None.
+    """
+    if graph is not None:
+        return graph.shortest_path(source, target, stats)
+    if stats is not None:
+        stats.update(new_stats())
+    if not connected(source, target):
+        return None
+    if source == target:
+        return []
+
+    parents = ParentArrays(source)
+    frontier = deque([0])
+    while frontier:
+        i = frontier.popleft()
+        if stats is not None:
+            stats["expanded"] += 1
+        for movie_id in people[parents.states[i]]["movies"]:
+            for person_id in movies[movie_id]["stars"]:
+                if person_id in parents:
+                    continue
+                child = parents.add(person_id, i, movie_id)
+                if person_id == target:
+                    return parents.path(child)
+                frontier.append(child)
+        if stats is not None:
+            stats["visited"] = len(parents)
+            record_frontier(stats, len(frontier))
+    return None
+
+
+def shortest_path_bidirectional(source, target, stats=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, growing one breadth-first
+    search from each end until the two meet in the middle.
+
+    If `stats` is a dict, the search counters from util.new_stats are
+    stored in it. If no possible path, returns None.
+    """
+    if graph is not None:
+        return graph.shortest_path_bidirectional(source, target, stats)
+
+    if stats is not None:
+        stats.update(new_stats(2))
+    if source == target:
+        return []
+    if not connected(source, target):
+        return None
+
+    # Each side maps a reached person to the (movie_id, person_id) step
+    # that reached it, pointing back towards where that side started
+    forward = {source: None}
+    backward = {target: None}
+    forward_layer = [source]
+    backward_layer = [target]
+
+    while forward_layer and backward_layer:
+
+        # Always grow the smaller layer, it is the cheaper one to expand
+        if len(forward_layer) <= len(backward_layer):
+            layer, parents, others = forward_layer, forward, backward
+        else:
+            layer, parents, others = backward_layer, backward, forward
+
+        next_layer = []
+        for person_id in layer:
+            if stats is not None:
+                stats["expanded"] += 1
+            for movie_id, neighbor_id in neighbors_for_person(person_id):
+                if neighbor_id in parents:
+                    continue
+                parents[neighbor_id] = (movie_id, person_id)
+                if stats is not None:
+                    stats["visited"] += 1
+
+                # Layers are expanded whole, so the first meeting point
+                # found already lies on a shortest path
+                if neighbor_id in others:
+                    return join_paths(forward, backward, neighbor_id)
+                next_layer.append(neighbor_id)
+
+        if layer is forward_layer:
+            forward_layer = next_layer
+        else:
+            backward_layer = next_layer
+        if stats is not None:
+            record_frontier(stats, len(forward_layer) + len(backward_layer))
+
+    return None
+
+
+def join_paths(forward, backward, meeting_id):
+    """
+    Rebuilds the (movie_id, person_id) path through `meeting_id` from the
+    parent maps of a bidirectional search.
+    """
+    # Walk back from the meeting point to the source
+    path = []
+    person_id = meeting_id
+    while forward[person_id] is not None:
+        movie_id, parent_id = forward[person_id]
+        path.append((movie_id, person_id))
+        person_id = parent_id
+    path.reverse()
+
+    # Walk on from the meeting point to the target
+    person_id = meeting_id
+    while backward[person_id] is not None:
+        movie_id, next_id = backward[person_id]
+        path.append((movie_id, next_id))
+        person_id = next_id
+    return path
+
+
 def initialize_visited(source):
 
     current_id = source
@@ -254,7 +512,7 @@ def person_id_for_name(name):
     """
     person_ids = list(names.get(name.lower(), set()))
     if len(person_ids) == 0:
-        return None
+        return person_id_for_suggestion(name)
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
         for person_id in person_ids:
@@ -273,6 +531,117 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def load_weights(cost=None, landmarks=4):
+    """
+    Builds the weighted graph used by shortest_path_weighted, pricing each
+    movie with cost(movie_id) (by default favouring recent movies), and
+    precomputes its landmark distances.
+    """
+    global weighted
+    if cost is None:
+        cost = recency(movies)
+    weighted = WeightedGraph.build(adjacency_index(), people, movies, cost)
+    weighted.choose_landmarks(landmarks)
+    return weighted
+
+
+def shortest_path_weighted(source, target, stats=None):
+    """
+    Returns the cheapest list of (movie_id, person_id) pairs
+    that connect the source to the target, by the movie costs given to
+    load_weights.
+
+    If no possible path, returns None.
+    """
+    if weighted is None:
+        load_weights()
+    if not adjacency_index().connected(source, target):
+        if stats is not None:
+            stats.update(new_stats())
+        return None
+    return weighted.shortest_path(source, target, stats)
+
+
+def connected(source, target):
+    """
+    Returns False if the two people are in different connected
+    components, so that no search can join them.
+    """
+    if graph is not None:
+        return graph.connected(source, target)
+    if components is None:
+        return True
+    return components.get(source) == components.get(target)
+
+
+def adjacency_index():
+    """
+    Returns the loaded adjacency index, building it from the tables
+    first if load_data was not asked for one.
+    """
+    global graph
+    if graph is None:
+        if isinstance(people, PeopleView):
+            graph = AdjacencyIndex.from_compact(people.data)
+        else:
+            graph = AdjacencyIndex.build(people, movies)
+    return graph
+
+
+def distances_from(source):
+    """
+    Runs a single breadth-first search from the source person, returning
+    a SearchTree whose path_to(person_id) gives the same list of
+    (movie_id, person_id) pairs as shortest_path for every target.
+
+    If the source is unknown, returns None.
+    """
+    return adjacency_index().single_source(source)
+
+
+def all_shortest_paths(source, target, limit=None):
+    """
+    Returns an iterator over the shortest lists of (movie_id, person_id)
+    pairs that connect the source to the target, stopping after `limit`
+    of them. Paths are generated lazily, so a small limit stays cheap
+    even when there are millions of paths.
+
+    Only paths of the shortest length are listed, so this is the first
+    `limit` shortest-length paths rather than the k shortest paths: once
+    they run out, no longer path follows.
+    """
+    paths = ShortestPaths(adjacency_index(), people, source, target)
+    return islice(paths, limit)
+
+
+def count_shortest_paths(source, target):
+    """
+    Returns how many shortest paths connect the source to the target,
+    without listing them, or 0 if they are not connected.
+    """
+    return ShortestPaths(adjacency_index(), people, source, target).count()
+
+
+def person_id_for_suggestion(name):
+    """
+    Offers close matches for a name that was not found, returning the
+    IMDB id for the chosen one, or None.
+    """
+    if name_index is None:
+        return None
+    suggestions = name_index.suggest(name)
+    if not suggestions:
+        return None
+    print(f"No one named '{name}'. Did you mean:")
+    for number, suggestion in enumerate(suggestions, 1):
+        person_id = next(iter(names[suggestion]))
+        print(f"{number}: {people[person_id]['name']}")
+    choice = input("Number (or blank for none): ").strip()
+    if not choice.isdigit() or not 1 <= int(choice) <= len(suggestions):
+        return None
+    return person_id_for_name(suggestions[int(choice) - 1])
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
@@ -286,5 +655,14 @@ def neighbors_for_person(person_id):
     return neighbors
 
 
+# Search algorithms selectable from the command line
+SEARCHES = {
+    "bfs": shortest_path,
+    "bidirectional": shortest_path_bidirectional,
+    "interned": shortest_path_interned,
+    "weighted": shortest_path_weighted,
+}
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,374 @@
+import struct
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+from util import new_stats, record_frontier
+
+
+def component_labels(people, movies):
+    """
+    Returns {person_id: label} naming each person's connected component,
+    by union-find over the stars of every movie. This is far cheaper than
+    building an AdjacencyIndex, so searches over the plain tables can
+    still tell at once that two people are not connected.
+    """
+    parent = {person_id: person_id for person_id in people}
+
+    def find(person_id):
+        # Path halving: point each person visited at its grandparent
+        while parent[person_id] != person_id:
+            parent[person_id] = parent[parent[person_id]]
+            person_id = parent[person_id]
+        return person_id
+
+    for movie in movies.values():
+        root = None
+        for person_id in movie["stars"]:
+            if person_id not in parent:
+                continue
+            other = find(person_id)
+            if root is None:
+                root = other
+            elif other != root:
+                parent[other] = root
+    return {person_id: find(person_id) for person_id in parent}
+
+
+class AdjacencyIndex():
+    """
+    Person to person adjacency, stored as compressed sparse rows.
+
+    People and movies are numbered by their position in the sorted lists
+    of their ids. The co-stars of person i are
+    neighbors[offsets[i]:offsets[i + 1]], and each of them is reached
+    through the movie at the same position in `via`. Every co-star is
+    listed once, however many movies the two people share.
+
+    components[i] labels the connected component of person i, and
+    component_sizes[label] counts the people in it, so searches between
+    people in different components return at once.
+    """
+
+    def __init__(self, person_ids, movie_ids, offsets, neighbors, via,
+                 components=None, component_sizes=None):
+        self.person_ids = person_ids
+        self.movie_ids = movie_ids
+        self.offsets = offsets
+        self.neighbors = neighbors
+        self.via = via
+        if components is None:
+            components, component_sizes = self.label_components()
+        self.components = components
+        self.component_sizes = component_sizes
+
+    @classmethod
+    def build(cls, people, movies):
+        """Builds the index from the `people` and `movies` tables."""
+        person_ids = sorted(people)
+        movie_ids = sorted(movies)
+        person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        movie_index = {movie_id: j for j, movie_id in enumerate(movie_ids)}
+
+        offsets = array("q", [0])
+        neighbors = array("i")
+        via = array("i")
+        for i, person_id in enumerate(person_ids):
+            seen = {i}
+            for movie_id in sorted(people[person_id]["movies"]):
+                for star_id in movies[movie_id]["stars"]:
+                    star = person_index[star_id]
+                    if star not in seen:
+                        seen.add(star)
+                        neighbors.append(star)
+                        via.append(movie_index[movie_id])
+            offsets.append(len(neighbors))
+
+        return cls(person_ids, movie_ids, offsets, neighbors, via)
+
+    @classmethod
+    def from_compact(cls, data):
+        """Builds the index from the integer columns of a CompactData."""
+        offsets = array("q", [0])
+        neighbors = array("i")
+        via = array("i")
+        for i in range(len(data.person_ids)):
+            seen = {i}
+            for movie in data.movies_of(i):
+                for star in data.stars_of(movie):
+                    if star not in seen:
+                        seen.add(star)
+                        neighbors.append(star)
+                        via.append(movie)
+            offsets.append(len(neighbors))
+
+        return cls(data.person_ids, data.movie_ids, offsets, neighbors, via)
+
+    def __len__(self):
+        return len(self.person_ids)
+
+    def label_components(self):
+        """
+        Labels every person with their connected component, returning
+        the (components, component_sizes) arrays.
+        """
+        components = array("i", [-1]) * len(self)
+        component_sizes = array("i")
+        for start in range(len(self)):
+            if components[start] >= 0:
+                continue
+            label = len(component_sizes)
+            components[start] = label
+            size = 0
+            stack = [start]
+            while stack:
+                i = stack.pop()
+                size += 1
+                for neighbor in self.neighbors[
+                    self.offsets[i]:self.offsets[i + 1]
+                ]:
+                    if components[neighbor] < 0:
+                        components[neighbor] = label
+                        stack.append(neighbor)
+            component_sizes.append(size)
+        return components, component_sizes
+
+    def connected(self, source, target):
+        """Returns True if two person ids are in the same component."""
+        start, goal = self.index_of(source), self.index_of(target)
+        return (start is not None and goal is not None
+                and self.components[start] == self.components[goal])
+
+    def component_size(self, person_id):
+        """Returns how many people are in a person's component."""
+        i = self.index_of(person_id)
+        if i is None:
+            return 0
+        return self.component_sizes[self.components[i]]
+
+    def largest_components(self, n=10):
+        """Returns the sizes of the n largest components, largest first."""
+        return sorted(self.component_sizes, reverse=True)[:n]
+
+    def index_of(self, person_id):
+        """Returns the dense index of a person id, or None if unknown."""
+        i = bisect_left(self.person_ids, person_id)
+        if i < len(self.person_ids) and self.person_ids[i] == person_id:
+            return i
+        return None
+
+    def neighbors_of(self, i):
+        """Returns (movie index, person index) pairs for co-stars of i."""
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return zip(self.via[start:end], self.neighbors[start:end])
+
+    def shortest_path(self, source, target, stats=None):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, searching breadth-first
+        from the source only.
+
+        If `stats` is a dict, the counters described in new_stats are
+        stored in it. If no possible path, returns None.
+        """
+        if stats is not None:
+            stats.update(new_stats(1))
+        start, goal = self.index_of(source), self.index_of(target)
+        if start is None or goal is None:
+            return None
+        if start == goal:
+            return []
+        if self.components[start] != self.components[goal]:
+            return None
+
+        parents = {start: None}
+        layer = [start]
+        while layer:
+            next_layer = []
+            for i in layer:
+                if stats is not None:
+                    stats["expanded"] += 1
+                for movie, neighbor in self.neighbors_of(i):
+                    if neighbor in parents:
+                        continue
+                    parents[neighbor] = (movie, i)
+                    if stats is not None:
+                        stats["visited"] += 1
+                    if neighbor == goal:
+                        return self.join_paths(parents, {goal: None}, goal)
+                    next_layer.append(neighbor)
+            layer = next_layer
+            if stats is not None:
+                record_frontier(stats, len(layer))
+        return None
+
+    def shortest_path_bidirectional(self, source, target, stats=None):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, growing one breadth-first
+        search from each end until the two meet in the middle.
+
+        If `stats` is a dict, the counters described in new_stats are
+        stored in it. If no possible path, returns None.
+        """
+        if stats is not None:
+            stats.update(new_stats(2))
+        start, goal = self.index_of(source), self.index_of(target)
+        if start is None or goal is None:
+            return None
+        if start == goal:
+            return []
+        if self.components[start] != self.components[goal]:
+            return None
+
+        forward = {start: None}
+        backward = {goal: None}
+        forward_layer = [start]
+        backward_layer = [goal]
+        while forward_layer and backward_layer:
+            if len(forward_layer) <= len(backward_layer):
+                layer, parents, others = forward_layer, forward, backward
+            else:
+                layer, parents, others = backward_layer, backward, forward
+
+            next_layer = []
+            for i in layer:
+                if stats is not None:
+                    stats["expanded"] += 1
+                for movie, neighbor in self.neighbors_of(i):
+                    if neighbor in parents:
+                        continue
+                    parents[neighbor] = (movie, i)
+                    if stats is not None:
+                        stats["visited"] += 1
+                    if neighbor in others:
+                        return self.join_paths(forward, backward, neighbor)
+                    next_layer.append(neighbor)
+
+            if layer is forward_layer:
+                forward_layer = next_layer
+            else:
+                backward_layer = next_layer
+            if stats is not None:
+                record_frontier(stats,
+                                len(forward_layer) + len(backward_layer))
+        return None
+
+    def single_source(self, source):
+        """
+        Runs one full breadth-first search from the source person, returning
+        the SearchTree of everyone reachable, or None if the source is
+        unknown.
+        """
+        start = self.index_of(source)
+        if start is None:
+            return None
+
+        distance = array("i", [-1]) * len(self)
+        parent = array("i", [-1]) * len(self)
+        via = array("i", [-1]) * len(self)
+        distance[start] = 0
+        layer = [start]
+        hops = 0
+        while layer:
+            hops += 1
+            next_layer = []
+            for i in layer:
+                for movie, neighbor in self.neighbors_of(i):
+                    if distance[neighbor] < 0:
+                        distance[neighbor] = hops
+                        parent[neighbor] = i
+                        via[neighbor] = movie
+                        next_layer.append(neighbor)
+            layer = next_layer
+        return SearchTree(self, start, distance, parent, via)
+
+    def join_paths(self, forward, backward, meeting):
+        """
+        Rebuilds the (movie_id, person_id) path through `meeting` from
+        forward and backward parent maps over person indexes.
+        """
+        steps = []
+        i = meeting
+        while forward[i] is not None:
+            movie, parent = forward[i]
+            steps.append((movie, i))
+            i = parent
+        steps.reverse()
+
+        i = meeting
+        while backward[i] is not None:
+            movie, following = backward[i]
+            steps.append((movie, following))
+            i = following
+
+        return [(self.movie_ids[movie], self.person_ids[i])
+                for movie, i in steps]
+
+
+class SearchTree():
+    """
+    Breadth-first search tree of everyone reachable from one person.
+
+    For person index i, distance[i] is their degrees of separation from the
+    source (-1 if not connected), and parent[i] and via[i] are the previous
+    person and the connecting movie on one shortest path from the source.
+    """
+
+    HEADER = struct.Struct("<8sqq")
+    MAGIC = b"DEGTREE1"
+
+    def __init__(self, graph, source, distance, parent, via):
+        self.graph = graph
+        self.source = source
+        self.distance = distance
+        self.parent = parent
+        self.via = via
+
+    def distance_to(self, person_id):
+        """Returns the degrees of separation to a person, or None."""
+        i = self.graph.index_of(person_id)
+        if i is None or self.distance[i] < 0:
+            return None
+        return self.distance[i]
+
+    def path_to(self, person_id):
+        """
+        Returns the list of (movie_id, person_id) pairs that connect the
+        source to the person, or None if they are not connected.
+        """
+        i = self.graph.index_of(person_id)
+        if i is None or self.distance[i] < 0:
+            return None
+        steps = []
+        while i != self.source:
+            steps.append((self.via[i], i))
+            i = self.parent[i]
+        steps.reverse()
+        return [(self.graph.movie_ids[movie], self.graph.person_ids[i])
+                for movie, i in steps]
+
+    def distances(self):
+        """Returns a Counter of how many people are at each distance."""
+        return Counter(d for d in self.distance if d >= 0)
+
+    def save(self, path):
+        """Writes the tree's arrays to a binary file."""
+        with open(path, "wb") as f:
+            f.write(self.HEADER.pack(self.MAGIC, self.source, len(self.graph)))
+            for values in (self.distance, self.parent, self.via):
+                f.write(array("i", values).tobytes())
+
+    @classmethod
+    def load(cls, path, graph):
+        """Reads a tree written by save() for the same graph."""
+        with open(path, "rb") as f:
+            magic, source, size = cls.HEADER.unpack(f.read(cls.HEADER.size))
+            if magic != cls.MAGIC or size != len(graph):
+                raise ValueError(f"{path} is not a search tree of this graph")
+            columns = []
+            for _ in range(3):
+                column = array("i")
+                column.fromfile(f, size)
+                columns.append(column)
+        return cls(graph, source, *columns)
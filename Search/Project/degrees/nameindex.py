@@ -0,0 +1,129 @@
+import difflib
+import heapq
+import math
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+# How many trigram candidates are re-ranked by full string similarity
+CANDIDATES = 50
+
+# Fraction of a query's trigrams a name must share to be a fuzzy match
+MIN_SHARED = 0.4
+
+# Most trigrams a single typo changes, so the strict first pass of a fuzzy
+# match looks for names missing at most this many of the query's trigrams
+TYPO_TRIGRAMS = 3
+
+
+def trigrams(name):
+    """Returns the set of letter trigrams of a padded, lowercase name."""
+    padded = f"  {name.lower()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex():
+    """
+    Prefix and fuzzy lookup over the lowercase keys of the `names` table.
+
+    Keys are kept sorted, so prefix completion is a binary search followed
+    by a scan. Fuzzy matching looks up each trigram of the query in an
+    inverted index, ranks names by shared trigrams and re-ranks the best
+    candidates by string similarity.
+
+    A name sharing at least k of the query's t trigrams appears in at
+    least one of the t - k + 1 rarest postings lists. Only those lists
+    are scanned for candidates, and the common lists are then checked by
+    binary search for just the candidates that can still reach k, so a
+    query never walks the postings of trigrams most names share. k starts
+    strict, at what one typo leaves, and drops to MIN_SHARED of t only if
+    no name is that close.
+    """
+
+    def __init__(self, names):
+        self.keys = sorted(names)
+        self.postings = {}
+        for i, key in enumerate(self.keys):
+            for trigram in trigrams(key):
+                postings = self.postings.get(trigram)
+                if postings is None:
+                    postings = self.postings[trigram] = array("i")
+                postings.append(i)
+
+    def complete(self, prefix, limit=10):
+        """Returns up to `limit` names starting with `prefix`."""
+        prefix = prefix.lower()
+        matches = []
+        i = bisect_left(self.keys, prefix)
+        while (i < len(self.keys) and len(matches) < limit
+               and self.keys[i].startswith(prefix)):
+            matches.append(self.keys[i])
+            i += 1
+        return matches
+
+    def fuzzy(self, name, limit=10):
+        """Returns up to `limit` names most similar to `name`, best first."""
+        name = name.lower()
+        query = trigrams(name)
+        empty = array("i")
+        lists = sorted((self.postings.get(trigram, empty)
+                        for trigram in query), key=len)
+        loosest = max(1, math.ceil(MIN_SHARED * len(query)))
+        for needed in sorted({max(loosest, len(query) - TYPO_TRIGRAMS),
+                              loosest}, reverse=True):
+            shared = self.shared_trigrams(lists, needed)
+            if shared:
+                break
+
+        # Jaccard similarity of trigram sets, counting a name of n
+        # characters as having n + 1 trigrams
+        def overlap(item):
+            i, count = item
+            return count / (len(query) + len(self.keys[i]) + 1 - count)
+
+        candidates = heapq.nlargest(CANDIDATES, shared.items(),
+                                    key=overlap)
+        candidates = [self.keys[i] for i, _ in candidates]
+        candidates.sort(
+            key=lambda key: difflib.SequenceMatcher(None, name, key).ratio(),
+            reverse=True
+        )
+        return candidates[:limit]
+
+    def shared_trigrams(self, lists, needed):
+        """
+        Returns {key index: count} for the keys in at least `needed` of
+        the postings lists, which are sorted shortest first.
+        """
+        scanned = len(lists) - needed + 1
+        shared = Counter()
+        for postings in lists[:scanned]:
+            shared.update(postings)
+
+        # Postings are in increasing order, so membership is a bisection,
+        # and a key missing from more lists than it can spare is dropped
+        for n in range(scanned, len(lists)):
+            postings = lists[n]
+            left = len(lists) - n - 1
+            kept = {}
+            for i, count in shared.items():
+                k = bisect_left(postings, i)
+                if k < len(postings) and postings[k] == i:
+                    kept[i] = count + 1
+                elif count + left >= needed:
+                    kept[i] = count
+            shared = kept
+        return shared
+
+    def suggest(self, name, limit=5):
+        """
+        Returns up to `limit` names for a query with no exact match:
+        completions of it first, then the closest fuzzy matches.
+        """
+        suggestions = self.complete(name, limit)
+        for match in self.fuzzy(name, limit):
+            if len(suggestions) >= limit:
+                break
+            if match not in suggestions:
+                suggestions.append(match)
+        return suggestions
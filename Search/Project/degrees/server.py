@@ -0,0 +1,210 @@
+import argparse
+import json
+import socketserver
+import statistics
+import sys
+import time
+from collections import deque
+
+import degrees
+from cache import PathCache
+
+# Number of recent query latencies kept for the stats endpoint
+LATENCY_WINDOW = 100000
+
+
+class QueryServer():
+    """
+    Answers shortest path queries against the data loaded in `degrees`.
+
+    Requests and responses are JSON objects, one per line:
+        {"source": ..., "target": ...}     one query
+        {"batch": [[source, target], ...]} many queries against one graph
+        {"stats": true}                    latency summary so far
+    People are given by IMDB id or by name. Queries may pick a search
+    with "search", which defaults to the server's own. Queries using the
+    server's own search go through `cache`, a PathCache, when there is one.
+    """
+
+    def __init__(self, search="bfs", cache=None):
+        self.search = search
+        self.cache = cache
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.queries = 0
+        self.errors = 0
+
+    def resolve(self, person):
+        """Returns the person id for an id or unambiguous name."""
+        person = str(person)
+        if person in degrees.people:
+            return person
+        person_ids = degrees.names.get(person.lower(), set())
+        if len(person_ids) == 1:
+            return next(iter(person_ids))
+        if not person_ids:
+            message = f"Person not found: {person}"
+            if degrees.name_index is not None:
+                suggestions = degrees.name_index.suggest(person)
+                if suggestions:
+                    message += f", did you mean {', '.join(suggestions)}?"
+            raise LookupError(message)
+        raise LookupError(
+            f"Ambiguous name {person}, use one of the ids "
+            f"{', '.join(sorted(person_ids))}"
+        )
+
+    def query(self, source, target, search=None):
+        """Answers one query, timing it for the stats endpoint."""
+        start = time.perf_counter()
+        try:
+            source_id = self.resolve(source)
+            target_id = self.resolve(target)
+            if self.cache is not None and search in (None, self.search):
+                path = self.cache.shortest_path(source_id, target_id)
+            else:
+                search = degrees.SEARCHES[search or self.search]
+                path = search(source_id, target_id)
+        except LookupError as e:
+            self.errors += 1
+            return {"source": source, "target": target, "error": str(e)}
+        finally:
+            elapsed = time.perf_counter() - start
+            self.latencies.append(elapsed)
+            self.queries += 1
+
+        return {
+            "source": source_id,
+            "target": target_id,
+            "degrees": None if path is None else len(path),
+            "path": path,
+            "ms": round(elapsed * 1000, 3),
+        }
+
+    def batch(self, pairs, search=None):
+        """Answers a list of (source, target) queries in order."""
+        start = time.perf_counter()
+        results = [self.query(source, target, search)
+                   for source, target in pairs]
+        return {
+            "results": results,
+            "ms": round((time.perf_counter() - start) * 1000, 3),
+        }
+
+    def stats(self):
+        """Summarises query latencies in milliseconds."""
+        summary = {"queries": self.queries, "errors": self.errors}
+        if self.latencies:
+            latencies = sorted(self.latencies)
+            seconds = {
+                "mean_ms": statistics.fmean(latencies),
+                "p50_ms": percentile(latencies, 50),
+                "p95_ms": percentile(latencies, 95),
+                "p99_ms": percentile(latencies, 99),
+                "max_ms": latencies[-1],
+            }
+            for key, value in seconds.items():
+                summary[key] = round(value * 1000, 3)
+        if self.cache is not None:
+            summary["cache"] = self.cache.stats()
+        return summary
+
+    def handle(self, request):
+        """Dispatches one decoded request to its endpoint."""
+        search = request.get("search")
+        if search is not None and search not in degrees.SEARCHES:
+            return {"error": f"Unknown search: {search}"}
+        if "batch" in request:
+            return self.batch(request["batch"], search)
+        if request.get("stats"):
+            return self.stats()
+        if "source" in request and "target" in request:
+            return self.query(request["source"], request["target"], search)
+        return {"error": "Expected source and target, batch or stats"}
+
+    def handle_line(self, line):
+        """Answers one JSON request line with one JSON response line."""
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+            response = self.handle(request)
+        except (ValueError, TypeError) as e:
+            response = {"error": f"Bad request: {e}"}
+        return json.dumps(response) + "\n"
+
+
+def percentile(values, percent):
+    """Returns the nearest-rank percentile of sorted `values`."""
+    rank = max(1, round(percent / 100 * len(values)))
+    return values[rank - 1]
+
+
+def serve_stream(server, lines, output):
+    """Answers every request line from `lines`, writing to `output`."""
+    for line in lines:
+        if line.strip():
+            output.write(server.handle_line(line))
+            output.flush()
+
+
+def serve_socket(server, address, unix=False):
+    """Answers request lines from any number of local socket clients."""
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                if line.strip():
+                    response = server.handle_line(line.decode("utf-8"))
+                    self.wfile.write(response.encode("utf-8"))
+
+    if unix:
+        listener = socketserver.ThreadingUnixStreamServer(address, Handler)
+    else:
+        listener = socketserver.ThreadingTCPServer(address, Handler)
+    with listener:
+        listener.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Answer degrees queries as JSON lines from one load."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--search", choices=sorted(degrees.SEARCHES),
+                        default="bidirectional")
+    parser.add_argument("--index", action="store_true")
+    parser.add_argument("--cache", action="store_true")
+    parser.add_argument("--compact", action="store_true")
+    parser.add_argument("--fuzzy", action="store_true")
+    parser.add_argument("--lru", type=int, default=0, metavar="N",
+                        help="cache up to N recent query results")
+    parser.add_argument("--trees", type=int, default=8, metavar="N",
+                        help="with --lru, keep search trees of N hub people")
+    parser.add_argument("--port", type=int,
+                        help="listen on this localhost TCP port")
+    parser.add_argument("--unix", help="listen on this unix socket path")
+    args = parser.parse_args()
+
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(args.directory, index=args.index, cache=args.cache,
+                      compact=args.compact, fuzzy=args.fuzzy)
+    print("Data loaded.", file=sys.stderr)
+
+    cache = None
+    if args.lru > 0:
+        # Search trees count hops, so they cannot answer weighted queries
+        trees = 0 if args.search == "weighted" else args.trees
+        cache = PathCache(degrees.SEARCHES[args.search],
+                          degrees.distances_from,
+                          max_paths=args.lru, max_trees=trees)
+    server = QueryServer(search=args.search, cache=cache)
+    if args.unix:
+        serve_socket(server, args.unix, unix=True)
+    elif args.port:
+        serve_socket(server, ("127.0.0.1", args.port))
+    else:
+        serve_stream(server, sys.stdin, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
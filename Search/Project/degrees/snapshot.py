@@ -0,0 +1,167 @@
+import json
+import mmap
+import os
+import struct
+from array import array
+from collections import Counter
+
+from compact import CompactData
+from graph import AdjacencyIndex
+
+# Name of the snapshot file kept next to the CSV files
+FILENAME = "degrees.snapshot"
+
+# CSV files whose modification times decide if a snapshot is still fresh
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+MAGIC = b"DEGSNAP4"
+HEADER = struct.Struct("<8sQ")
+
+# Integer columns of CompactData, with their array typecodes
+ARRAYS = {
+    "person_births": "h",
+    "movie_years": "h",
+    "person_movies_offsets": "q",
+    "person_movies": "i",
+    "movie_stars_offsets": "q",
+    "movie_stars": "i",
+    "name_people": "i",
+}
+
+# String columns of CompactData, each stored as a blob and offsets section
+STRINGS = (
+    "person_ids", "person_names", "movie_ids", "movie_titles", "name_keys"
+)
+
+
+class StringColumn():
+    """
+    Read-only sequence of strings stored as one UTF-8 blob, where string i
+    is blob[offsets[i]:offsets[i + 1]]. Strings are decoded on access.
+    """
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    @classmethod
+    def encode(cls, strings):
+        """Returns the (blob, offsets) pair for a list of strings."""
+        blob = bytearray()
+        offsets = array("q", [0])
+        for string in strings:
+            blob += string.encode("utf-8")
+            offsets.append(len(blob))
+        return bytes(blob), offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("string column index out of range")
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+def fingerprint(directory):
+    """Returns the size and modification time of each source CSV file."""
+    sources = {}
+    for filename in SOURCES:
+        stat = os.stat(os.path.join(directory, filename))
+        sources[filename] = [stat.st_size, stat.st_mtime_ns]
+    return sources
+
+
+def save(directory, data, graph):
+    """
+    Writes compact tables, and their adjacency index, to the snapshot
+    file in `directory`.
+    """
+    sections = {}
+    for name in STRINGS:
+        sections[f"{name}_blob"], sections[f"{name}_offsets"] = (
+            StringColumn.encode(getattr(data, name))
+        )
+    for name, typecode in ARRAYS.items():
+        sections[name] = array(typecode, getattr(data, name))
+    sections["adjacency_offsets"] = array("q", graph.offsets)
+    sections["adjacency_neighbors"] = array("i", graph.neighbors)
+    sections["adjacency_via"] = array("i", graph.via)
+    sections["adjacency_components"] = array("i", graph.components)
+    sections["adjacency_component_sizes"] = array(
+        "i", graph.component_sizes
+    )
+
+    # Lay the sections out back to back, each aligned to 8 bytes
+    layout = {}
+    position = 0
+    for name, section in sections.items():
+        size = len(section) * getattr(section, "itemsize", 1)
+        layout[name] = [position, size, getattr(section, "typecode", None)]
+        position += size + (-size % 8)
+
+    header = json.dumps({
+        "sources": fingerprint(directory),
+        "sections": layout,
+        "skipped": dict(data.skipped),
+    }).encode("utf-8")
+    header += b" " * (-len(header) % 8)
+
+    path = os.path.join(directory, FILENAME)
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(header)))
+        f.write(header)
+        for name, section in sections.items():
+            data = section if isinstance(section, bytes) else section.tobytes()
+            f.write(data)
+            f.write(b"\0" * (-len(data) % 8))
+    os.replace(temporary, path)
+
+
+def load(directory):
+    """
+    Memory-maps the snapshot in `directory`, returning the CompactData and
+    AdjacencyIndex stored in it. The CompactData keeps the skipped row
+    counts of the load that wrote the snapshot.
+    Returns None if there is no snapshot, or if the CSV files have changed
+    since it was written.
+    """
+    path = os.path.join(directory, FILENAME)
+    try:
+        with open(path, "rb") as f:
+            magic, length = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC:
+                return None
+            header = json.loads(f.read(length))
+            if header["sources"] != fingerprint(directory):
+                return None
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError, KeyError, struct.error):
+        return None
+
+    view = memoryview(data)[HEADER.size + length:]
+    sections = {}
+    for name, (position, size, typecode) in header["sections"].items():
+        section = view[position:position + size]
+        sections[name] = section.cast(typecode) if typecode else section
+
+    columns = {name: sections[name] for name in ARRAYS}
+    for name in STRINGS:
+        columns[name] = StringColumn(
+            sections[f"{name}_blob"], sections[f"{name}_offsets"]
+        )
+    data = CompactData(**columns, skipped=Counter(header["skipped"]))
+    graph = AdjacencyIndex(
+        data.person_ids, data.movie_ids, sections["adjacency_offsets"],
+        sections["adjacency_neighbors"], sections["adjacency_via"],
+        sections["adjacency_components"],
+        sections["adjacency_component_sizes"]
+    )
+    return data, graph
@@ -0,0 +1,134 @@
+from array import array
+from collections import deque
+
+
+class Node():
+    __slots__ = ("state", "parent", "action")
+
+    def __init__(self, state, parent, action=None):
+        self.state = state
+        self.parent = parent
+        self.action = action
+
+
+class StackFrontier():
+    def __init__(self):
+        self.frontier = []
+        # Counts of the states currently in the frontier, so membership
+        # checks never have to scan the frontier itself
+        self.states = {}
+
+    def add(self, node):
+        self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+
+    def contains_state(self, state):
+        return state in self.states
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def __len__(self):
+        return len(self.frontier)
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        return self.forget(self.frontier.pop())
+
+    def forget(self, node):
+        """Drops one copy of a removed node's state from the state counts."""
+        count = self.states[node.state]
+        if count == 1:
+            del self.states[node.state]
+        else:
+            self.states[node.state] = count - 1
+        return node
+
+
+class QueueFrontier(StackFrontier):
+    def __init__(self):
+        super().__init__()
+        self.frontier = deque()
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        return self.forget(self.frontier.popleft())
+
+
+class ParentArrays():
+    """
+    The parent pointers of a search, kept in flat arrays instead of one
+    Node per state.
+
+    Each state reached is interned to a small int id, its position in
+    `states`. parents[id] is the id of the state it was reached from (-1
+    for the start) and actions[id] the action taken. Nodes are only
+    created when a path is rebuilt.
+
+    This is a cut-down copy of ParentArrays in the lecture code's search
+    package, which degrees cannot import as it is submitted on its own.
+    Its searches are breadth-first and their actions are the movie id
+    strings the tables already hold, so it leaves out the costs, updates
+    and action interning of that version. Fix a bug in either one in
+    both.
+    """
+
+    def __init__(self, start):
+        self.ids = {start: 0}
+        self.states = [start]
+        self.parents = array("i", [-1])
+        self.actions = [None]
+
+    def __len__(self):
+        return len(self.states)
+
+    def __contains__(self, state):
+        return state in self.ids
+
+    def add(self, state, parent, action):
+        """Interns a newly reached state, returning its id."""
+        i = len(self.states)
+        self.ids[state] = i
+        self.states.append(state)
+        self.parents.append(parent)
+        self.actions.append(action)
+        return i
+
+    def node(self, i):
+        """Rebuilds the chain of Nodes from the start to the state i."""
+        chain = []
+        while i != -1:
+            chain.append(i)
+            i = self.parents[i]
+        node = None
+        for i in reversed(chain):
+            node = Node(self.states[i], node, self.actions[i])
+        return node
+
+    def path(self, i):
+        """Returns the (action, state) pairs from the start to state i."""
+        path = []
+        node = self.node(i)
+        while node.parent is not None:
+            path.append((node.action, node.state))
+            node = node.parent
+        path.reverse()
+        return path
+
+
+def new_stats(start=1):
+    """
+    Returns fresh counters for a search: the people it expanded, the most
+    it held in its frontier at once and the people it visited. A search
+    starts with `start` people (2 when it also searches back from the
+    target) both in its frontier and visited.
+    """
+    return {"expanded": 0, "frontier peak": start, "visited": start}
+
+
+def record_frontier(stats, size):
+    """Raises the frontier peak in `stats` to `size` if it is larger."""
+    if size > stats["frontier peak"]:
+        stats["frontier peak"] = size
@@ -0,0 +1,213 @@
+import heapq
+import math
+import random
+from array import array
+
+from compact import PeopleView, find
+from util import new_stats, record_frontier
+
+INFINITY = math.inf
+
+
+def recency(movies, per_year=0.1):
+    """
+    Returns a movie cost function that favours recent movies: a movie
+    costs 1, plus `per_year` for every year it is older than the newest
+    movie. Movies with no year cost as much as the oldest.
+    """
+    years = [int(movies[movie_id]["year"] or 0) for movie_id in movies]
+    newest = max(years, default=0)
+    oldest = min((y for y in years if y), default=newest)
+
+    def cost(movie_id):
+        released = int(movies[movie_id]["year"] or oldest)
+        return 1 + per_year * (newest - released)
+    return cost
+
+
+class WeightedGraph():
+    """
+    Person to person adjacency with a cost on every edge, for finding the
+    cheapest rather than the shortest chain of movies.
+
+    It is laid out like an AdjacencyIndex, with the same person and movie
+    numbering, except that each co-star is reached through the cheapest
+    movie the two people share, whose cost is at the same position in
+    `costs`. movie_costs holds the cost of every movie, and `landmarks`
+    holds the (person index, cost array) pairs that give the ALT lower
+    bounds for A* search.
+    """
+
+    def __init__(self, person_ids, movie_ids, movie_costs,
+                 offsets, neighbors, via, costs):
+        self.person_ids = person_ids
+        self.movie_ids = movie_ids
+        self.movie_costs = movie_costs
+        self.offsets = offsets
+        self.neighbors = neighbors
+        self.via = via
+        self.costs = costs
+        self.landmarks = []
+
+    @classmethod
+    def build(cls, graph, people, movies, cost):
+        """
+        Builds the weighted graph for an AdjacencyIndex from the tables,
+        pricing each movie with cost(movie_id).
+        """
+        movie_costs = array("d", map(cost, graph.movie_ids))
+        if any(c <= 0 for c in movie_costs):
+            raise ValueError("movie costs must be positive")
+
+        if isinstance(people, PeopleView):
+            data = people.data
+            movies_of = data.movies_of
+            stars_of = data.stars_of
+        else:
+            movie_index = {m: j for j, m in enumerate(graph.movie_ids)}
+
+            def movies_of(i):
+                person = people[graph.person_ids[i]]
+                return [movie_index[m] for m in person["movies"]]
+
+            def stars_of(j):
+                stars = movies[graph.movie_ids[j]]["stars"]
+                return [graph.index_of(star) for star in stars]
+
+        offsets = array("q", [0])
+        neighbors = array("i")
+        via = array("i")
+        costs = array("d")
+        for i in range(len(graph)):
+            cheapest = {}
+            for movie in movies_of(i):
+                for star in stars_of(movie):
+                    if star != i and (
+                        star not in cheapest
+                        or movie_costs[movie] < movie_costs[cheapest[star]]
+                    ):
+                        cheapest[star] = movie
+            for star, movie in sorted(cheapest.items()):
+                neighbors.append(star)
+                via.append(movie)
+                costs.append(movie_costs[movie])
+            offsets.append(len(neighbors))
+
+        return cls(graph.person_ids, graph.movie_ids, movie_costs,
+                   offsets, neighbors, via, costs)
+
+    def __len__(self):
+        return len(self.person_ids)
+
+    def dijkstra(self, start):
+        """Returns the array of cheapest costs from person index `start`."""
+        distance = array("d", [INFINITY]) * len(self)
+        distance[start] = 0
+        heap = [(0, start)]
+        while heap:
+            d, i = heapq.heappop(heap)
+            if d > distance[i]:
+                continue
+            for n in range(self.offsets[i], self.offsets[i + 1]):
+                neighbor = self.neighbors[n]
+                candidate = d + self.costs[n]
+                if candidate < distance[neighbor]:
+                    distance[neighbor] = candidate
+                    heapq.heappush(heap, (candidate, neighbor))
+        return distance
+
+    def choose_landmarks(self, count=4, seed=0):
+        """
+        Picks `count` landmarks far apart from each other, starting from a
+        random person with co-stars, and stores their cost arrays.
+        """
+        candidates = [i for i in range(len(self))
+                      if self.offsets[i] < self.offsets[i + 1]]
+        if not candidates:
+            return
+        self.landmarks = []
+
+        # Each new landmark is the person farthest from all chosen so far
+        # within the first landmark's component
+        nearest = self.dijkstra(random.Random(seed).choice(candidates))
+        for _ in range(count):
+            landmark = max(
+                (i for i in range(len(self)) if nearest[i] < INFINITY),
+                key=nearest.__getitem__
+            )
+            distance = self.dijkstra(landmark)
+            self.landmarks.append((landmark, distance))
+            for i in range(len(self)):
+                if distance[i] < nearest[i]:
+                    nearest[i] = distance[i]
+
+    def lower_bound(self, i, goal):
+        """
+        Returns a lower bound on the cost from i to goal by the triangle
+        inequality over the landmarks (the ALT heuristic).
+        """
+        bound = 0
+        for _, distance in self.landmarks:
+            a, b = distance[i], distance[goal]
+            if a < INFINITY and b < INFINITY:
+                bound = max(bound, abs(a - b))
+        return bound
+
+    def shortest_path(self, source, target, stats=None):
+        """
+        Returns the cheapest list of (movie_id, person_id) pairs that
+        connect the source to the target, by A* search guided by the
+        landmark lower bounds (plain Dijkstra if there are none).
+
+        If `stats` is a dict, the search counters from util.new_stats are
+        stored in it. If no possible path, returns None.
+        """
+        if stats is not None:
+            stats.update(new_stats())
+        start = find(self.person_ids, source)
+        goal = find(self.person_ids, target)
+        if start is None or goal is None:
+            return None
+
+        cost = {start: 0}
+        parents = {start: None}
+        closed = set()
+        heap = [(self.lower_bound(start, goal), start)]
+        while heap:
+            _, i = heapq.heappop(heap)
+            if i in closed:
+                continue
+            if i == goal:
+                return self.rebuild(parents, goal)
+            closed.add(i)
+            if stats is not None:
+                stats["expanded"] += 1
+            for n in range(self.offsets[i], self.offsets[i + 1]):
+                neighbor = self.neighbors[n]
+                candidate = cost[i] + self.costs[n]
+                if candidate < cost.get(neighbor, INFINITY):
+                    cost[neighbor] = candidate
+                    if stats is not None and neighbor not in parents:
+                        stats["visited"] += 1
+                    parents[neighbor] = (self.via[n], i)
+                    estimate = candidate + self.lower_bound(neighbor, goal)
+                    heapq.heappush(heap, (estimate, neighbor))
+            if stats is not None:
+                record_frontier(stats, len(heap))
+        return None
+
+    def rebuild(self, parents, goal):
+        """Rebuilds the (movie_id, person_id) path ending at goal."""
+        path = []
+        i = goal
+        while parents[i] is not None:
+            movie, parent = parents[i]
+            path.append((self.movie_ids[movie], self.person_ids[i]))
+            i = parent
+        path.reverse()
+        return path
+
+    def path_cost(self, path):
+        """Returns the total cost of the movies along a path."""
+        return sum(self.movie_costs[find(self.movie_ids, movie_id)]
+                   for movie_id, _ in path)